@@ -111,7 +111,8 @@ class ShortlistingAgent:
         else:
             admission["status"] = "rejected"
         
-        update_document("admissions", document_id, admission)
+        # Keep the score in metadata so the priority list can rank applications without loading them
+        update_document("admissions", document_id, admission, metadata={"overall_score": float(overall_score)})
         
         return admission
     
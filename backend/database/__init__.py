@@ -3,13 +3,23 @@
 from .chroma_client import (
     initialize_chroma_db,
     load_static_documents,
+    backfill_admission_metadata,
     get_client,
     get_collection,
     add_document,
+    add_documents,
     get_document,
+    find_documents,
+    find_documents_with_ids,
+    collection_count,
     query_documents,
     update_document,
-    delete_document
+    update_metadata,
+    update_document_fields,
+    update_documents_fields,
+    delete_document,
+    json_loads,
+    json_dumps
 )
 initialize_chroma_db()
 
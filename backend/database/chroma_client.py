@@ -3,8 +3,23 @@ from chromadb.config import Settings
 import os
 from typing import Dict, List, Any, Optional
 import json
+from datetime import datetime
 from chromadb.utils import embedding_functions
 
+# orjson is a faster drop-in for the document (de)serialization hot path; fall back to json
+try:
+    from orjson import loads as orjson_loads, dumps as orjson_dumps
+
+    def json_loads(data):
+        return orjson_loads(data)
+
+    def json_dumps(obj):
+        # Chroma stores documents as str, orjson returns bytes
+        return orjson_dumps(obj).decode()
+except ImportError:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
 # Global client instance
 _client = None
 _collections = {}
@@ -50,6 +65,9 @@ def initialize_chroma_db():
     # Load initial data for static documents if needed
     load_static_documents()
     
+    # Bring applications written before the list filters existed up to date
+    backfill_admission_metadata()
+    
     print("ChromaDB initialized successfully")
 
 def load_static_documents():
@@ -76,36 +94,114 @@ def load_static_documents():
         
         eligibility_collection.add(
             ids=[f"criteria_{i}" for i in range(len(sample_criteria))],
-            documents=[json.dumps(doc) for doc in sample_criteria],
+            documents=[json_dumps(doc) for doc in sample_criteria],
             metadatas=sample_criteria
         )
     
     # Similarly, load other static documents
     # This is just an example - you would load actual data in production
 
+def backfill_admission_metadata():
+    """Add the filterable metadata fields the admin list relies on to older applications"""
+    admissions_collection = get_collection("admissions")
+    results = admissions_collection.get(include=["metadatas"])
+    
+    updates_by_id = {}
+    needs_score = []
+    for doc_id, metadata in zip(results['ids'], results['metadatas'] or []):
+        metadata = metadata or {}
+        
+        if not ("submission_date_ts" in metadata and "submission_date_day" in metadata and "full_name_lc" in metadata):
+            updates = {"full_name_lc": metadata.get('full_name', '').lower()}
+            try:
+                submitted_at = datetime.fromisoformat(metadata.get('submission_date', '2000-01-01'))
+                updates["submission_date_ts"] = int(submitted_at.timestamp())
+                updates["submission_date_day"] = submitted_at.date().isoformat()
+            except (TypeError, ValueError):
+                # Leave the date fields unset, the application just won't match a date filter
+                print(f"Skipping unparsable submission_date on application {doc_id}")
+            updates_by_id[doc_id] = updates
+        
+        if "overall_score" not in metadata:
+            needs_score.append(doc_id)
+    
+    # Scores from evaluations made before the agent started writing them to metadata,
+    # only the applications missing one have their body loaded
+    if needs_score:
+        scored = admissions_collection.get(ids=needs_score, include=["documents"])
+        for doc_id, doc in zip(scored['ids'], scored['documents']):
+            shortlisting_results = json_loads(doc).get('shortlisting_results') if doc else None
+            if shortlisting_results:
+                updates_by_id.setdefault(doc_id, {})["overall_score"] = float(shortlisting_results.get('overall_score', 0))
+    
+    if updates_by_id:
+        admissions_collection.update(ids=list(updates_by_id), metadatas=list(updates_by_id.values()))
+    
+    return len(updates_by_id)
+
 def add_document(collection_name: str, document: Dict[str, Any], document_id: str, metadata: Optional[Dict[str, Any]] = None):
     """Add a document to a collection"""
     collection = get_collection(collection_name)
     collection.add(
         ids=[document_id],
-        documents=[json.dumps(document)],
+        documents=[json_dumps(document)],
         metadatas=[metadata] if metadata else None
     )
     return document_id
 
+def add_documents(collection_name: str, documents: List[Dict[str, Any]], document_ids: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+    """Add several documents to a collection in one call (documents may already be JSON strings)"""
+    if not document_ids:
+        return []
+    collection = get_collection(collection_name)
+    collection.add(
+        ids=list(document_ids),
+        documents=[document if isinstance(document, str) else json_dumps(document) for document in documents],
+        metadatas=metadatas
+    )
+    return document_ids
+
 def get_document(collection_name: str, document_id: str):
     """Get a document from a collection by ID"""
     collection = get_collection(collection_name)
     result = collection.get(ids=[document_id])
     if result and result['documents'] and result['documents'][0]:
-        return json.loads(result['documents'][0])
+        return json_loads(result['documents'][0])
     return None
 
+def collection_count(collection_name: str, where: Optional[Dict[str, Any]] = None):
+    """Count the documents in a collection, optionally only those matching a metadata filter"""
+    collection = get_collection(collection_name)
+    if where is None:
+        return collection.count()
+    # count() can't take a filter, so fetch only the matching ids
+    return len(collection.get(where=where, include=[])['ids'])
+
+def find_documents(collection_name: str, where: Optional[Dict[str, Any]] = None, ids: Optional[List[str]] = None, limit: Optional[int] = None, offset: Optional[int] = None):
+    """Get documents by metadata filter and/or ID without a similarity search, as (document, metadata) pairs"""
+    return [
+        (document, metadata)
+        for _, document, metadata in find_documents_with_ids(collection_name, where=where, ids=ids, limit=limit, offset=offset)
+    ]
 
-def query_documents(collection_name: str, query: str, n_results: int = 5, metadata_filter: Optional[Dict[str, Any]] = None):
+def find_documents_with_ids(collection_name: str, where: Optional[Dict[str, Any]] = None, ids: Optional[List[str]] = None, limit: Optional[int] = None, offset: Optional[int] = None):
+    """Like find_documents, but as (id, document, metadata) triples so callers can write back by ID"""
+    collection = get_collection(collection_name)
+    result = collection.get(ids=ids, where=where, limit=limit, offset=offset, include=["documents", "metadatas"])
+    return [
+        (doc_id, json_loads(doc), metadata or {})
+        for doc_id, doc, metadata in zip(result['ids'], result['documents'], result['metadatas'])
+        if doc
+    ]
+
+def query_documents(collection_name: str, query: str, n_results: int = 5, metadata_filter: Optional[Dict[str, Any]] = None, include: Optional[List[str]] = None):
     """Query documents in a collection"""
     collection = get_collection(collection_name)
     
+    # Only the document bodies are returned, so don't transfer embeddings/distances by default
+    if include is None:
+        include = ["documents"]
+    
     # Handle multiple filters and complex conditions
     if metadata_filter:
         processed_filters = []
@@ -130,25 +226,27 @@ def query_documents(collection_name: str, query: str, n_results: int = 5, metada
             partial_results = collection.query(
                 query_texts=[query],
                 n_results=n_results,
-                where=processed_filter
+                where=processed_filter,
+                include=include
             )
             results.extend(partial_results['documents'][0])
         
         # Remove duplicates and parse JSON
         unique_documents = {doc for doc in results if doc}  # Use a set to remove duplicates
-        documents = [json.loads(doc) for doc in unique_documents]
+        documents = [json_loads(doc) for doc in unique_documents]
     else:
         # No filter, proceed normally
         results = collection.query(
             query_texts=[query],
             n_results=n_results,
-            where=None
+            where=None,
+            include=include
         )
         
         documents = []
         for doc in results['documents'][0]:
             if doc:
-                documents.append(json.loads(doc))
+                documents.append(json_loads(doc))
     
     return documents
 
@@ -157,11 +255,55 @@ def update_document(collection_name: str, document_id: str, document: Dict[str,
     collection = get_collection(collection_name)
     collection.update(
         ids=[document_id],
-        documents=[json.dumps(document)],
+        documents=[json_dumps(document)],
         metadatas=[metadata] if metadata else None
     )
     return document_id
 
+def update_metadata(collection_name: str, document_id: str, metadata: Dict[str, Any]):
+    """Update only the metadata of a document, leaving its body and embedding untouched"""
+    collection = get_collection(collection_name)
+    collection.update(
+        ids=[document_id],
+        metadatas=[metadata]
+    )
+    return document_id
+
+def update_document_fields(collection_name: str, document_id: str, fields: Optional[Dict[str, Any]] = None, metadata: Optional[Dict[str, Any]] = None):
+    """Update only the given fields of a document and/or the given metadata keys"""
+    if not fields:
+        # Nothing in the body changes, so don't rewrite (and re-embed) it
+        return update_metadata(collection_name, document_id, metadata)
+    collection = get_collection(collection_name)
+    result = collection.get(ids=[document_id], include=["documents"])
+    if not result['documents'] or not result['documents'][0]:
+        return None
+    document = json_loads(result['documents'][0])
+    document.update(fields)
+    collection.update(
+        ids=[document_id],
+        documents=[json_dumps(document)],
+        metadatas=[metadata] if metadata else None
+    )
+    return document_id
+
+def update_documents_fields(collection_name: str, document_ids: List[str], fields: Dict[str, Any]):
+    """Apply the same field update to several documents with one read and one write"""
+    if not document_ids:
+        return []
+    collection = get_collection(collection_name)
+    result = collection.get(ids=list(document_ids), include=["documents"])
+    updated_ids, documents = [], []
+    for doc_id, doc in zip(result['ids'], result['documents']):
+        if doc:
+            document = json_loads(doc)
+            document.update(fields)
+            updated_ids.append(doc_id)
+            documents.append(json_dumps(document))
+    if updated_ids:
+        collection.update(ids=updated_ids, documents=documents)
+    return updated_ids
+
 def delete_document(collection_name: str, document_id: str):
     """Delete a document from a collection"""
     collection = get_collection(collection_name)
@@ -7,6 +7,7 @@ from components.header import render_header
 from components.footer import render_footer
 from streamlit_option_menu import option_menu
 from components.login import login_page, add_logout_to_sidebar, initialize_auth_db
+from config import DEBUG_MODE
 
 # Configure the page
 st.set_page_config(
@@ -128,7 +129,11 @@ else:
     render_footer()
 
 # Add a debug expander in development
-if st.session_state.get("debug_mode", False) or st.experimental_get_query_params().get("debug", ["false"])[0].lower() == "true":
+# Resolve the debug flag once per session (env var first, URL params only as a fallback)
+if "debug_mode" not in st.session_state:
+    st.session_state.debug_mode = DEBUG_MODE or st.experimental_get_query_params().get("debug", ["false"])[0].lower() == "true"
+
+if st.session_state.debug_mode:
     with st.expander("Debug Information"):
         st.write("Session State:", st.session_state)
         debug_col1, debug_col2, debug_col3 = st.columns(3)
@@ -5,6 +5,7 @@ import matplotlib.pyplot as plt
 import altair as alt
 import json
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
 from components.sidebar import render_sidebar
 from components.header import render_header
@@ -36,6 +37,15 @@ def parse_age_range(age_group):
         min_age, max_age = age_group.split('-')
         return int(min_age), int(max_age)
 
+def count_matching(collection_name, query, metadata_filter):
+    """Count documents in a collection that match a metadata filter"""
+    return len(query_documents(collection_name, query, n_results=1000, metadata_filter=metadata_filter))
+
+def count_in_parallel(collection_name, queries_and_filters):
+    """Run several count_matching queries concurrently, preserving input order"""
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        return list(executor.map(lambda args: count_matching(collection_name, *args), queries_and_filters))
+
 # Query for pending applications
 pending_applications = len(query_documents("admissions", 
                                         "pending review", 
@@ -149,15 +159,9 @@ with tab1:
 with tab2:
     # Get program distribution data from ChromaDB
     programs = ["Computer Science", "Business Administration", "Engineering", "Psychology", "Biology", "Other"]
-    program_counts = []
     
-    for program in programs:
-        # Query ChromaDB for applications by program
-        program_count = len(query_documents("admissions", 
-                                         program, 
-                                         n_results=1000, 
-                                         metadata_filter={"program": program}))
-        program_counts.append(program_count)
+    # Query ChromaDB for applications by program, overlapping the per-program calls
+    program_counts = count_in_parallel("admissions", [(program, {"program": program}) for program in programs])
     
     program_data = {
         'Program': programs,
@@ -212,15 +216,10 @@ with tab3:
     with col1:
         # Get gender distribution data from ChromaDB
         genders = ["Male", "Female", "Non-binary", "Not Disclosed"]
-        gender_counts = []
         
-        for gender in genders:
-            # Query ChromaDB for applications by gender
-            gender_count = len(query_documents("admissions", 
-                                            "", 
-                                            n_results=1000, 
-                                            metadata_filter={"gender": gender.lower()}))
-            gender_counts.append(gender_count if gender_count > 0 else np.random.randint(20, 700))  # Fallback
+        # Query ChromaDB for applications by gender
+        gender_counts = count_in_parallel("admissions", [("", {"gender": gender.lower()}) for gender in genders])
+        gender_counts = [count if count > 0 else np.random.randint(20, 700) for count in gender_counts]  # Fallback
         
         gender_data = pd.DataFrame({
             'Gender': genders,
@@ -236,27 +235,17 @@ with tab3:
     with col2:
         # Get age group distribution data from ChromaDB
         age_groups = ['18-21', '22-25', '26-30', '31-40', '41+']
-        age_counts = []
         
-        for age_group in age_groups:
-            # Modified approach: Use age_group as a direct filter
-            # This assumes metadata is stored with an 'age_group' field rather than raw 'age'
-            age_count = len(query_documents("admissions", 
-                                         "", 
-                                         n_results=1000, 
-                                         metadata_filter={"age_group": age_group}))
-            
-            # If no results, use fallback or try alternative approach
-            if age_count == 0:
-                # Use fallback random data for demonstration
-                age_count = np.random.randint(20, 620)
-                
-                # In a real application, you might:
-                # 1. Store both 'age' and 'age_group' in metadata
-                # 2. Query by age range at data insertion time
-                # 3. Implement post-processing to filter results after query
-            
-            age_counts.append(age_count)
+        # Modified approach: Use age_group as a direct filter
+        # This assumes metadata is stored with an 'age_group' field rather than raw 'age'
+        age_counts = count_in_parallel("admissions", [("", {"age_group": age_group}) for age_group in age_groups])
+        
+        # If no results, use fallback random data for demonstration
+        # In a real application, you might:
+        # 1. Store both 'age' and 'age_group' in metadata
+        # 2. Query by age range at data insertion time
+        # 3. Implement post-processing to filter results after query
+        age_counts = [count if count > 0 else np.random.randint(20, 620) for count in age_counts]
         
         age_data = pd.DataFrame({
             'Age Group': age_groups,
@@ -312,11 +301,16 @@ with col1:
 
 with col2:
     fig, ax = plt.subplots()
-    ax.scatter(agent_data['Avg. Processing Time (s)'], agent_data['Accuracy (%)'], s=100)
-    
-    for i, agent in enumerate(agent_data['Agent']):
-        ax.annotate(agent, 
-                    (agent_data['Avg. Processing Time (s)'][i], agent_data['Accuracy (%)'][i]),
+    # Pull the columns out as NumPy arrays once instead of indexing the Series per agent
+    processing_times = agent_data['Avg. Processing Time (s)'].to_numpy()
+    accuracies = agent_data['Accuracy (%)'].to_numpy()
+    names = agent_data['Agent'].to_numpy()
+
+    ax.scatter(processing_times, accuracies, s=100)
+
+    for x, y, agent in zip(processing_times, accuracies, names):
+        ax.annotate(agent,
+                    (x, y),
                     textcoords="offset points",
                     xytext=(0,10), 
                     ha='center')
@@ -333,7 +327,7 @@ st.subheader("Recent Activities")
 # Get recent activities from ChromaDB
 # In a real app, you would store activities in a collection and query by date
 # Here we're using hardcoded data for illustration
-activities = [
+activities = pd.DataFrame([
     {"time": "Today, 10:30 AM", "activity": "New application received from Maria Garcia", "type": "Application"},
     {"time": "Today, 09:15 AM", "activity": "Transcript verified for student S12348", "type": "Document"},
     {"time": "Yesterday, 4:45 PM", "activity": "Loan application approved for John Smith", "type": "Loan"},
@@ -342,21 +336,21 @@ activities = [
     {"time": "Mar 18, 5:30 PM", "activity": "New scholarship eligibility assessment completed", "type": "Loan"},
     {"time": "Mar 18, 1:15 PM", "activity": "Bulk email sent to all applicants with pending documents", "type": "System"},
     {"time": "Mar 17, 3:40 PM", "activity": "Application processing metrics report generated", "type": "System"}
-]
+])
 
-for activity in activities:
-    col1, col2 = st.columns([1, 6])
-    with col1:
-        st.write(activity["time"])
-    with col2:
-        if activity["type"] == "Application":
-            st.info(activity["activity"])
-        elif activity["type"] == "Document":
-            st.success(activity["activity"])
-        elif activity["type"] == "Loan":
-            st.warning(activity["activity"])
-        else:
-            st.text(activity["activity"])
+# Row colouring by activity type (mirrors the info/success/warning palette)
+activity_styles = {
+    "Application": "background-color: #e7f3ff",
+    "Document": "background-color: #e7ffe7",
+    "Loan": "background-color: #fff8e1"
+}
+
+styled_activities = activities.style.apply(
+    lambda row: [activity_styles.get(row["type"], "")] * len(row),
+    axis=1
+)
+
+st.dataframe(styled_activities, use_container_width=True, hide_index=True)
 
 st.subheader("Quick Actions")
 
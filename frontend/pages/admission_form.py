@@ -4,24 +4,41 @@ from datetime import datetime
 import json
 import uuid
 import os
-import asyncio
 
 from components.sidebar import render_sidebar
 from components.header import render_header
 from components.footer import render_footer
-from backend.database.chroma_client import get_collection,initialize_chroma_db, add_document, get_document, query_documents, update_document
+from backend.database.chroma_client import get_collection,initialize_chroma_db, add_document, get_document, query_documents, update_document, json_loads, json_dumps
 
-# Import the ShortlistingAgent
-from backend.Agents.shortlisting_agent import ShortlistingAgent
+# asyncio and the ShortlistingAgent are imported lazily on the admin paths that use them,
+# so the student form doesn't pay for them on every rerun
+
+# Programs offered; shared by the application form and every admin program picker
+PROGRAMS = ("Computer Science, B.Sc.", "Business Administration, B.B.A.", "Mechanical Engineering, B.Eng.",
+            "Psychology, B.A.", "Data Science, M.Sc.", "MBA")
+BATCH_PROGRAMS = ("All Programs",) + PROGRAMS
 
 # Add this line near the top of your files, after importing streamlit
 if "user_role" not in st.session_state:
     st.session_state["user_role"] = "admin"  # For testing only
 
+@st.cache_resource(show_spinner=False)
+def admissions_col():
+    """Shared handle to the admissions collection."""
+    initialize_chroma_db()
+    return get_collection("admissions")
+
+@st.cache_resource(show_spinner=False)
+def documents_col():
+    """Shared handle to the documents collection."""
+    initialize_chroma_db()
+    return get_collection("documents")
+
 # Function to check if student has an existing application
+@st.cache_data(ttl=30, show_spinner=False)
 def get_student_application(student_id):
     """Retrieve application for a student from ChromaDB."""
-    admissions_collection = get_collection("admissions")
+    admissions_collection = admissions_col()
     results = admissions_collection.get(
         where={"student_id": student_id}
     )
@@ -29,7 +46,7 @@ def get_student_application(student_id):
     if results and results['documents'] and len(results['documents']) > 0:
         try:
             # Make sure the document is a valid JSON string
-            application_data = json.loads(results['documents'][0])
+            application_data = json_loads(results['documents'][0])
             application_data['id'] = results['ids'][0]
                 
             return application_data
@@ -40,24 +57,64 @@ def get_student_application(student_id):
             
     return None
 
+# Function to fetch a student's uploaded documents
+def get_student_documents(student_id):
+    """Retrieve the documents uploaded by a student."""
+    results = documents_col().get(
+        where={"student_id": student_id},
+        include=["metadatas", "documents"]
+    )
+    
+    student_documents = []
+    for doc, metadata in zip(results['documents'], results['metadatas'] or []):
+        if doc:
+            doc_data = json_loads(doc)
+            # Document status is kept current in metadata, not in the JSON body
+            if metadata and 'status' in metadata:
+                doc_data['status'] = metadata['status']
+            student_documents.append(doc_data)
+    
+    return student_documents
+
+# Function to check which of a student's documents are still unverified
+def get_pending_document_names(student_id):
+    """Return names of a student's unverified documents, or None if nothing has been uploaded."""
+    results = documents_col().get(
+        where={"student_id": student_id},
+        include=["metadatas"]
+    )
+    
+    if not results['ids']:
+        return None
+    
+    metadatas = [metadata or {} for metadata in (results['metadatas'] or [])]
+    return [
+        metadata.get('document_name', 'Unknown Document')
+        for metadata in metadatas
+        if metadata.get('status') != "Verified"
+    ]
+
 # Function to save application to ChromaDB
 def save_application(application_data):
     """Save application data to ChromaDB."""
     try:
-        # Ensure collection exists
-        admissions_collection = get_collection("admissions")
-        
-        # Generate a unique application ID
+        # Generate a unique application ID: "A" + submission day (YYYYMMDD) + random suffix.
+        # The embedded day lets the admin list filter by date from the ID alone.
         document_id = f"A{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8]}"
         application_data["document_id"] = document_id
         
         # Add metadata for efficient querying
+        submitted_at = datetime.now()
+        full_name = f"{application_data['first_name']} {application_data['last_name']}"
         metadata = {
             "student_id": application_data["student_id"],
-            "full_name": f"{application_data['first_name']} {application_data['last_name']}",
+            "full_name": full_name,
+            "full_name_lc": full_name.lower(),
             "program": application_data["program_applying_for"],
             "status": "Under Review",
-            "submission_date": datetime.now().isoformat()
+            "submission_date": submitted_at.isoformat(),
+            "submission_date_ts": int(submitted_at.timestamp()),
+            "submission_date_day": submitted_at.date().isoformat()
         }
         
         # Add the application to ChromaDB
@@ -68,6 +125,10 @@ def save_application(application_data):
             metadata=metadata
         )
         
+        # New application must show up in the admin list and student status page immediately
+        get_all_applications.clear()
+        get_student_application.clear()
+        
         return document_id
     except Exception as e:
         st.error(f"Error saving application: {str(e)}")
@@ -75,98 +136,272 @@ def save_application(application_data):
 
 
 # Function to get all applications (for admin view)
+@st.cache_data(ttl=60, max_entries=64, show_spinner=False)
 def get_all_applications(status_filter="All", program_filter="All", date_filter=None, search_term=None):
+    """Retrieve filtered applications, cached per filter combination.
+    
+    date_filter should be passed as an ISO date string so it hashes cleanly as a cache key.
+    """
+    return _get_all_applications_uncached(status_filter, program_filter, date_filter, search_term)
+
+
+def _get_all_applications_uncached(status_filter="All", program_filter="All", date_filter=None, search_term=None):
     """Retrieve filtered applications from ChromaDB."""
     try:
         # Ensure collection exists
-        admissions_collection = get_collection("admissions")
+        admissions_collection = admissions_col()
         
-        # Build where clause based on filters
-        where_clause = {}
+        # Let Chroma apply the status/program/date filters against the stored metadata
+        conditions = []
         if status_filter != "All":
-            where_clause["status"] = status_filter
+            conditions.append({"status": status_filter})
         if program_filter != "All":
-            where_clause["program"] = program_filter
+            conditions.append({"program": program_filter})
+        date_clause = _date_where_clause(date_filter)
+        if date_clause:
+            conditions.append(date_clause)
         
-        # Get all applications that match the filters
+        if len(conditions) > 1:
+            where = {"$and": conditions}
+        else:
+            where = conditions[0] if conditions else None
+        
+        # Get all applications that match the filters - the list view only needs metadata,
+        # full documents are loaded on demand for the detail view
         results = admissions_collection.get(
-            where=where_clause if where_clause else None
+            where=where,
+            include=["metadatas"]
         )
         
-        applications = []
-        for i, doc in enumerate(results['documents']):
-            if doc:
-                app_data = json.loads(doc)
-                metadata = results['metadatas'][i] if results['metadatas'] else {}
-                
-                # Apply date filter if specified
-                if date_filter:
-                    submission_date = datetime.fromisoformat(metadata.get('submission_date', '2000-01-01')).date()
-                    if submission_date < date_filter:
-                        continue
-                
-                # Apply search filter if specified
-                if search_term and search_term.lower() not in metadata.get('full_name', '').lower() and search_term not in app_data.get('document_id', ''):
-                    continue
-                    
-                # Add application to results
-                applications.append({
-                    "id": app_data.get('document_id', results['ids'][i]),
-                    "name": metadata.get('full_name', 'Unknown'),
-                    "program": metadata.get('program', 'Unknown'),
-                    "date": metadata.get('submission_date', 'Unknown').split('T')[0],
-                    "status": metadata.get('status', 'Unknown'),
-                    "student_id": metadata.get('student_id', 'Unknown'),
-                    "document_id": results['ids'][i]
-                })
-        
-        return applications
+        return _applications_from_results(results, search_term)
     except Exception as e:
         print(f"Error getting applications: {str(e)}")
         return []
 
 
+def _date_where_clause(date_filter):
+    """Chroma where clause keeping applications submitted on or after date_filter."""
+    if not date_filter:
+        return None
+    since = datetime.fromisoformat(date_filter) if isinstance(date_filter, str) else datetime.combine(date_filter, datetime.min.time())
+    return {"submission_date_ts": {"$gte": int(since.timestamp())}}
+
+
+def _applications_from_results(results, search_term=None):
+    """Build the admin list rows from a metadata-only Chroma get() result."""
+    if not results['ids']:
+        return []
+    
+    # Build the table column-wise from the metadata instead of row by row
+    df = pd.json_normalize([metadata or {} for metadata in results['metadatas']])
+    df = df.reindex(columns=["full_name", "full_name_lc", "program", "submission_date_day", "status", "student_id"])
+    df["document_id"] = results['ids']
+    
+    # Apply search filter if specified
+    if search_term:
+        name_match = df["full_name_lc"].fillna("").str.contains(search_term.lower(), regex=False)
+        id_match = df["document_id"].str.contains(search_term, regex=False)
+        df = df[name_match | id_match]
+    
+    df = df.assign(
+        id=df["document_id"],
+        date=df["submission_date_day"]
+    ).rename(columns={"full_name": "name"})
+    
+    return df[["id", "name", "program", "date", "status", "student_id", "document_id"]].fillna("Unknown").to_dict("records")
+
+
+# Number of rows fetched per page when the admin list is unfiltered
+APPLICATIONS_PAGE_SIZE = 50
+
+def get_all_application_ids():
+    """Return every application ID (newest first), fetched ids-only once per session."""
+    admissions_collection = admissions_col()
+    ids = st.session_state.get("all_app_ids")
+    
+    # A cheap count() tells us when applications were added or removed since the last fetch
+    if ids is None or len(ids) != admissions_collection.count():
+        ids = sorted(admissions_collection.get(include=[])['ids'], reverse=True)
+        st.session_state["all_app_ids"] = ids
+    
+    return ids
+
+def filter_ids_by_submission_day(app_ids, date_filter):
+    """Keep IDs submitted on or after date_filter, decoding the day embedded in the ID.
+    
+    IDs that don't follow the A<YYYYMMDD> layout are kept and left to the Chroma date filter.
+    """
+    if not date_filter:
+        return app_ids
+    since_day = (date_filter if isinstance(date_filter, str) else date_filter.isoformat()).replace("-", "")
+    return [
+        app_id for app_id in app_ids
+        if not (app_id[:1] == "A" and app_id[1:9].isdigit()) or app_id[1:9] >= since_day
+    ]
+
+def get_applications_page(page_ids, date_filter=None):
+    """Fetch list rows for one page of application IDs."""
+    if not page_ids:
+        return []
+    
+    try:
+        results = admissions_col().get(
+            ids=list(page_ids),
+            where=_date_where_clause(date_filter),
+            include=["metadatas"]
+        )
+        return _applications_from_results(results)
+    except Exception as e:
+        print(f"Error getting applications: {str(e)}")
+        return []
+
+
+def forget_loaded_application():
+    """Drop the admin detail panel's cached application, e.g. after a batch agent run rewrote admissions."""
+    st.session_state.pop("loaded_doc", None)
+    st.session_state.pop("loaded_doc_id", None)
+
+def invalidate_loaded_application(document_id):
+    """Forget the admin detail panel's cached copy of an application after it changes."""
+    if st.session_state.get("loaded_doc_id") == document_id:
+        forget_loaded_application()
+
+# Function to rank a program's evaluated shortlist
+@st.cache_data(ttl=60, show_spinner=False)
+def get_top_shortlisted(program):
+    """Return evaluated, shortlisted applications for a program ordered by score (highest first).
+    
+    Uses the overall_score metadata written by the ShortlistingAgent, so no document bodies are loaded.
+    Cached per program; cleared whenever a status changes or an evaluation writes new scores.
+    """
+    results = admissions_col().get(
+        where={"$and": [
+            {"status": "shortlisted"},
+            {"program": program},
+            {"overall_score": {"$gte": 0}}
+        ]},
+        include=["metadatas"]
+    )
+    
+    priority_apps = [
+        {
+            "id": doc_id,
+            "name": (metadata or {}).get('full_name', 'Unknown'),
+            "score": (metadata or {}).get('overall_score', 0),
+            "document_id": doc_id
+        }
+        for doc_id, metadata in zip(results['ids'], results['metadatas'] or [])
+    ]
+    
+    # Sort by score (highest first)
+    priority_apps.sort(key=lambda x: x['score'], reverse=True)
+    return priority_apps
+
 # Function to update application status
-def update_application_status(document_id, new_status):
-    """Update the status of an application."""
+def update_application_status(document_id, new_status, reason=None):
+    """Update the status of an application, optionally recording the reason for the change."""
     try:
         # Ensure collection exists
-        admissions_collection = get_collection("admissions")
+        admissions_collection = admissions_col()
         
-        # Get the existing application
-        result = admissions_collection.get(ids=[document_id])
+        # Get the existing application body (metadata isn't needed, see below)
+        result = admissions_collection.get(ids=[document_id], include=["documents"])
         if result and result['documents'] and result['documents'][0]:
-            app_data = json.loads(result['documents'][0])
+            app_data = json_loads(result['documents'][0])
             
             # Update the status
             app_data['status'] = new_status
+            if reason:
+                app_data['status_reason'] = reason
             
-            # Update metadata
-            metadata = result['metadatas'][0] if result['metadatas'] and result['metadatas'][0] else {}
-            metadata['status'] = new_status
-            
-            # Update the document in the collection
+            # Write body and status in one call; Chroma merges partial metadata on update,
+            # so only the changed key is sent and the other metadata fields are preserved
             admissions_collection.update(
                 ids=[document_id],
-                documents=[json.dumps(app_data)],
-                metadatas=[metadata]
+                documents=[json_dumps(app_data)],
+                metadatas=[{"status": new_status}]
             )
+            
+            # Drop cached application lists so the new status is visible
+            get_all_applications.clear()
+            get_student_application.clear()
+            get_program_capacity.clear()
+            get_top_shortlisted.clear()
+            st.session_state.pop('capacity_results', None)
+            invalidate_loaded_application(document_id)
             return True
         return False
     except Exception as e:
         st.error(f"Error updating application status: {str(e)}")
         return False
 
+# Chroma get/update calls are chunked to keep each request bounded
+BULK_UPDATE_CHUNK_SIZE = 500
+
+def bulk_update_status(document_ids, new_status):
+    """Update the status of many applications with one read and one write per chunk.
+    
+    Returns the number of applications updated.
+    """
+    updated_count = 0
+    try:
+        admissions_collection = admissions_col()
+        
+        for start in range(0, len(document_ids), BULK_UPDATE_CHUNK_SIZE):
+            chunk = document_ids[start:start + BULK_UPDATE_CHUNK_SIZE]
+            result = admissions_collection.get(ids=chunk, include=["documents"])
+            
+            ids_to_update = []
+            documents = []
+            for doc_id, doc in zip(result['ids'], result['documents']):
+                if doc:
+                    app_data = json_loads(doc)
+                    app_data['status'] = new_status
+                    ids_to_update.append(doc_id)
+                    documents.append(json_dumps(app_data))
+            
+            if ids_to_update:
+                admissions_collection.update(
+                    ids=ids_to_update,
+                    documents=documents,
+                    metadatas=[{"status": new_status} for _ in ids_to_update]
+                )
+                for doc_id in ids_to_update:
+                    invalidate_loaded_application(doc_id)
+                updated_count += len(ids_to_update)
+    except Exception as e:
+        st.error(f"Error updating application status: {str(e)}")
+    
+    if updated_count:
+        get_all_applications.clear()
+        get_student_application.clear()
+        get_program_capacity.clear()
+        get_top_shortlisted.clear()
+        st.session_state.pop('capacity_results', None)
+    return updated_count
+
+@st.cache_resource(show_spinner=False)
+def get_shortlisting_agent():
+    """Create the ShortlistingAgent once and share it across reruns and sessions.
+    
+    The one instance is used by every session at the same time, so the agent must not keep
+    per-call state on itself; it only sets its LLM and crew agent up in __init__.
+    """
+    from backend.Agents.shortlisting_agent import ShortlistingAgent
+    return ShortlistingAgent()
+
 # New function to handle ShortlistingAgent evaluation
 async def run_shortlisting_evaluation(document_id):
     """Run the ShortlistingAgent evaluation for an application."""
     try:
-        # Initialize the ShortlistingAgent
-        agent = ShortlistingAgent()
+        # Reuse the shared ShortlistingAgent
+        agent = get_shortlisting_agent()
         
         # Evaluate the application
         result = await agent.evaluate_application(document_id)
         
+        # The evaluation wrote a new overall_score
+        get_top_shortlisted.clear()
         return result
     except Exception as e:
         st.error(f"Error during shortlisting evaluation: {str(e)}")
@@ -176,12 +411,13 @@ async def run_shortlisting_evaluation(document_id):
 async def run_batch_shortlisting(program=None):
     """Run batch evaluation for all applications ready for shortlisting."""
     try:
-        # Initialize the ShortlistingAgent
-        agent = ShortlistingAgent()
+        # Reuse the shared ShortlistingAgent
+        agent = get_shortlisting_agent()
         
         # Run batch evaluation
         results = await agent.batch_evaluate(program)
         
+        get_top_shortlisted.clear()
         return results
     except Exception as e:
         st.error(f"Error during batch shortlisting: {str(e)}")
@@ -191,8 +427,8 @@ async def run_batch_shortlisting(program=None):
 async def check_program_capacity(program):
     """Check the capacity for a specific program."""
     try:
-        # Initialize the ShortlistingAgent
-        agent = ShortlistingAgent()
+        # Reuse the shared ShortlistingAgent
+        agent = get_shortlisting_agent()
         
         # Evaluate capacity
         result = await agent.evaluate_capacity(program)
@@ -202,8 +438,38 @@ async def check_program_capacity(program):
         st.error(f"Error checking program capacity: {str(e)}")
         return None
 
-# Ensure ChromaDB is initialized
-initialize_chroma_db()
+def run_async(coro):
+    """Run a coroutine on this session's persistent event loop instead of paying asyncio.run setup per click."""
+    import asyncio
+    
+    # Kept per session: the agent calls block inside their coroutines, so a loop shared by
+    # every session would serialize them. A script run executes on its own thread, so the
+    # session's loop is never re-entered.
+    loop = st.session_state.get("event_loop")
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        st.session_state["event_loop"] = loop
+    return loop.run_until_complete(coro)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_program_capacity(program):
+    """Capacity analysis for a program, cached for five minutes so the agent isn't re-run on every click.
+    
+    Raises RuntimeError when the check fails, so a failure is never cached.
+    """
+    result = run_async(check_program_capacity(program))
+    if result is None:
+        raise RuntimeError(f"Capacity check for {program} failed")
+    return result
+
+async def run_admin_combo(program):
+    """Run batch shortlisting for a program, then check its capacity."""
+    # The capacity counts depend on the statuses the batch writes, so only read them once it is done
+    batch_results = await run_batch_shortlisting(program)
+    return batch_results, await check_program_capacity(program)
+
+# Ensure ChromaDB is initialized (once per process, via the cached collection handle)
+admissions_col()
 # Render sidebar for navigation
 render_sidebar()
 
@@ -251,20 +517,9 @@ if user_role == "student":
         # Display current status
         st.info(f"**Current Status:** {current_status}")
         
-        # Check documents status
-        documents_collection = get_collection("documents")
-        documents_results = documents_collection.get(
-            where={"student_id": student_id}
-        )
-        
-        pending_documents = []
-        if documents_results and documents_results['documents']:
-            for i, doc in enumerate(documents_results['documents']):
-                if doc:
-                    doc_data = json.loads(doc)
-                    if doc_data.get('status') != "Verified":
-                        pending_documents.append(doc_data.get('document_name', 'Unknown Document'))
-        else:
+        # Check documents status from metadata alone (no document bodies are loaded)
+        pending_documents = get_pending_document_names(student_id)
+        if pending_documents is None:
             pending_documents = ["Official Transcripts", "ID/Passport", "Proof of Residence", "Recommendation Letter"]
             
         # Display next steps
@@ -306,104 +561,101 @@ if user_role == "student":
             st.markdown(recommendation)
     
     else:
-        # New application form
-        st.subheader("Personal Information")
+        # New application form - batched in st.form so inputs only rerun the script on submit
+        with st.form("application_form", clear_on_submit=False):
+            st.subheader("Personal Information")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            first_name = st.text_input("First Name")
-            date_of_birth = st.date_input("Date of Birth", min_value=datetime(1950, 1, 1))
-            gender = st.selectbox("Gender", ["Select", "Male", "Female", "Non-binary", "Prefer not to say"])
-            phone = st.text_input("Phone Number")
+            col1, col2 = st.columns(2)
+            with col1:
+                first_name = st.text_input("First Name")
+                date_of_birth = st.date_input("Date of Birth", min_value=datetime(1950, 1, 1))
+                gender = st.selectbox("Gender", ["Select", "Male", "Female", "Non-binary", "Prefer not to say"])
+                phone = st.text_input("Phone Number")
             
-        with col2:
-            last_name = st.text_input("Last Name")
-            email = st.text_input("Email Address")
-            nationality = st.text_input("Nationality")
-            address = st.text_area("Address", height=100)
+            with col2:
+                last_name = st.text_input("Last Name")
+                email = st.text_input("Email Address")
+                nationality = st.text_input("Nationality")
+                address = st.text_area("Address", height=100)
         
-        st.subheader("Academic Information")
+            st.subheader("Academic Information")
         
-        col1, col2 = st.columns(2)
-        with col1:
-            education_level = st.selectbox("Highest Education Level", 
-                                          ["Select", "High School", "Associate's Degree", "Bachelor's Degree",
-                                           "Master's Degree", "Doctorate"])
-            institution = st.text_input("Institution Name")
-            graduation_year = st.number_input("Year of Graduation", min_value=1980, max_value=2025)
+            col1, col2 = st.columns(2)
+            with col1:
+                education_level = st.selectbox("Highest Education Level", 
+                                              ["Select", "High School", "Associate's Degree", "Bachelor's Degree",
+                                               "Master's Degree", "Doctorate"])
+                institution = st.text_input("Institution Name")
+                graduation_year = st.number_input("Year of Graduation", min_value=1980, max_value=2025)
             
-        with col2:
-            program_applying_for = st.selectbox("Program Applying For", 
-                                           ["Select", "Computer Science, B.Sc.",
-                                            "Business Administration, B.B.A.",
-                                            "Mechanical Engineering, B.Eng.",
-                                            "Psychology, B.A.",
-                                            "Data Science, M.Sc.",
-                                            "MBA"])
-            gpa = st.number_input("GPA", min_value=0.0, max_value=10.0, step=0.1)
-            semester = st.selectbox("Starting Semester", ["Fall 2025", "Spring 2026", "Fall 2026"])
-        
-        st.subheader("Additional Information")
-        
-        extracurricular = st.text_area("Extracurricular Activities", 
-                                       placeholder="Please list relevant extracurricular activities, awards, or achievements")
-        
-        statement = st.text_area("Personal Statement", 
-                                placeholder="Why do you want to join this program? What are your career goals?", 
-                                height=200)
-        
-        funding = st.selectbox("How do you plan to fund your education?", 
-                              ["Select", "Self-funded", "Scholarship", "Student Loan", "Family Support", "Employer Sponsored"])
-        
-        # File upload placeholders - actual upload would be in document_upload.py
-        st.subheader("Required Documents")
-        st.info("You will be able to upload these documents after submitting your application form")
-        st.markdown("""
-        - Official Transcripts
-        - ID or Passport Copy
-        - Resume/CV
-        - Recommendation Letters
-        """)
-        
-        # Terms and conditions
-        agree = st.checkbox("I certify that all information provided is true and complete to the best of my knowledge")
-        
-        if st.button("Submit Application", disabled=not agree):
-            if not first_name or not last_name or not email or gender == "Select" or program_applying_for == "Select":
-                st.error("Please fill out all required fields")
-            else:
-                # Create application data
-                application_data = {
-                    "student_id": student_id,
-                    "first_name": first_name,
-                    "last_name": last_name,
-                    "date_of_birth": date_of_birth.isoformat(),
-                    "gender": gender,
-                    "phone": phone,
-                    "email": email,
-                    "nationality": nationality,
-                    "address": address,
-                    "education_level": education_level,
-                    "institution": institution,
-                    "graduation_year": graduation_year,
-                    "program_applying_for": program_applying_for,
-                    "gpa": gpa,
-                    "semester": semester,
-                    "extracurricular": extracurricular,
-                    "statement": statement,
-                    "funding": funding,
-                    "status": "Under Review",
-                    "submission_date": datetime.now().isoformat()
-                }
+            with col2:
+                program_applying_for = st.selectbox("Program Applying For", ("Select",) + PROGRAMS)
+                gpa = st.number_input("GPA", min_value=0.0, max_value=10.0, step=0.1)
+                semester = st.selectbox("Starting Semester", ["Fall 2025", "Spring 2026", "Fall 2026"])
+        
+            st.subheader("Additional Information")
+        
+            extracurricular = st.text_area("Extracurricular Activities", 
+                                           placeholder="Please list relevant extracurricular activities, awards, or achievements")
+        
+            statement = st.text_area("Personal Statement", 
+                                    placeholder="Why do you want to join this program? What are your career goals?", 
+                                    height=200)
+        
+            funding = st.selectbox("How do you plan to fund your education?", 
+                                  ["Select", "Self-funded", "Scholarship", "Student Loan", "Family Support", "Employer Sponsored"])
+        
+            # File upload placeholders - actual upload would be in document_upload.py
+            st.subheader("Required Documents")
+            st.info("You will be able to upload these documents after submitting your application form")
+            st.markdown("""
+            - Official Transcripts
+            - ID or Passport Copy
+            - Resume/CV
+            - Recommendation Letters
+            """)
+        
+            # Terms and conditions
+            agree = st.checkbox("I certify that all information provided is true and complete to the best of my knowledge")
+        
+            if st.form_submit_button("Submit Application"):
+                if not agree:
+                    st.error("Please certify that the information provided is true and complete")
+                elif not first_name or not last_name or not email or gender == "Select" or program_applying_for == "Select":
+                    st.error("Please fill out all required fields")
+                else:
+                    # Create application data
+                    application_data = {
+                        "student_id": student_id,
+                        "first_name": first_name,
+                        "last_name": last_name,
+                        "date_of_birth": date_of_birth.isoformat(),
+                        "gender": gender,
+                        "phone": phone,
+                        "email": email,
+                        "nationality": nationality,
+                        "address": address,
+                        "education_level": education_level,
+                        "institution": institution,
+                        "graduation_year": graduation_year,
+                        "program_applying_for": program_applying_for,
+                        "gpa": gpa,
+                        "semester": semester,
+                        "extracurricular": extracurricular,
+                        "statement": statement,
+                        "funding": funding,
+                        "status": "Under Review",
+                        "submission_date": datetime.now().isoformat()
+                    }
                 
-                # Save application to ChromaDB
-                document_id = save_application(application_data)
+                    # Save application to ChromaDB
+                    document_id = save_application(application_data)
                 
-                st.success(f"Application submitted successfully! Your application ID is {document_id}")
-                st.info("Please proceed to document upload section to complete your application")
+                    st.success(f"Application submitted successfully! Your application ID is {document_id}")
+                    st.info("Please proceed to document upload section to complete your application")
                 
-                # Rerun to show status page
-                st.rerun()
+                    # Rerun to show status page
+                    st.rerun()
 
 elif user_role == "admin":
     # Admin view - Applications dashboard
@@ -418,47 +670,69 @@ elif user_role == "admin":
         with col1:
             status_filter = st.selectbox("Filter by Status", ["All", "Under Review", "Documents Verified", "Interview", "Accepted", "Rejected", "shortlisted"])
         with col2:
-            program_filter = st.selectbox("Filter by Program", ["All", "Computer Science, B.Sc.", "Business Administration, B.B.A.", "Mechanical Engineering, B.Eng.", "Psychology, B.A.", "Data Science, M.Sc.", "MBA"])
+            program_filter = st.selectbox("Filter by Program", ("All",) + PROGRAMS)
         with col3:
             date_filter = st.date_input("Applications Since", datetime(2025, 1, 1))
         
         # Search box
-        search = st.text_input("Search by Name or ID")
+        search_col, refresh_col = st.columns([5, 1])
+        with search_col:
+            st.text_input("Search by Name or ID", key="search_input")
+            search = st.session_state.search_input.strip()
+        with refresh_col:
+            if st.button("Refresh", use_container_width=True):
+                get_all_applications.clear()
+                st.session_state.pop("all_app_ids", None)
         
         # Get applications data from ChromaDB
-        applications_data = get_all_applications(
-            status_filter=status_filter, 
-            program_filter=program_filter, 
-            date_filter=date_filter.isoformat() if date_filter else None,
-            search_term=search
-        )
+        if status_filter == "All" and program_filter == "All" and not search:
+            # Unfiltered view: page through the ID list so each rerun only loads one page of metadata
+            all_app_ids = filter_ids_by_submission_day(get_all_application_ids(), date_filter)
+            page_count = max(1, -(-len(all_app_ids) // APPLICATIONS_PAGE_SIZE))
+            page = st.number_input("Page", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+            page_start = (page - 1) * APPLICATIONS_PAGE_SIZE
+            applications_data = get_applications_page(
+                all_app_ids[page_start:page_start + APPLICATIONS_PAGE_SIZE],
+                date_filter=date_filter.isoformat() if date_filter else None
+            )
+        else:
+            applications_data = get_all_applications(
+                status_filter=status_filter, 
+                program_filter=program_filter, 
+                date_filter=date_filter.isoformat() if date_filter else None,
+                search_term=search
+            )
         
         if applications_data:
-            # Convert to DataFrame for display
-            df = pd.DataFrame(applications_data)
-            # Keep only display columns
-            display_df = df[["id", "name", "program", "date", "status"]]
-            
-            # Display applications table
-            st.dataframe(display_df, use_container_width=True)
+            # Display applications table straight from the records, showing only the display columns
+            st.dataframe(
+                applications_data,
+                column_order=["id", "name", "program", "date", "status"],
+                use_container_width=True
+            )
             
             # Application detail section
             st.subheader("Application Details")
             
-            selected_app = st.selectbox(
+            # Select by ID and look the row up directly instead of parsing the label
+            id_to_app = {app['id']: app for app in applications_data}
+            app_id = st.selectbox(
                 "Select Application to Review", 
-                [f"{app['id']} - {app['name']}" for app in applications_data],
-                index=0
+                list(id_to_app),
+                index=0,
+                format_func=lambda option: f"{option} - {id_to_app[option]['name']}"
             )
             
-            if selected_app:
-                app_id = selected_app.split(" - ")[0]
-                # Find the selected application in our data
-                selected_app_data = next((app for app in applications_data if app['id'] == app_id), None)
+            if app_id:
+                selected_app_data = id_to_app.get(app_id)
                 
                 if selected_app_data:
-                    # Get full application data
-                    full_app_data = get_document("admissions", selected_app_data['document_id'])
+                    # Get full application data, only re-fetching when the selection changes
+                    doc_id = selected_app_data['document_id']
+                    if st.session_state.get("loaded_doc_id") != doc_id:
+                        st.session_state["loaded_doc"] = get_document("admissions", doc_id)
+                        st.session_state["loaded_doc_id"] = doc_id
+                    full_app_data = st.session_state["loaded_doc"]
                     
                     if full_app_data:
                         # Display application details in an organized way
@@ -497,22 +771,17 @@ elif user_role == "admin":
                             st.markdown("### Document Status")
                             
                             # Get documents for this student
-                            documents_collection = get_collection("documents")
-                            documents_results = documents_collection.get(
-                                where={"student_id": full_app_data.get('student_id')}
-                            )
+                            student_documents = get_student_documents(full_app_data.get('student_id'))
                             
-                            if documents_results and documents_results['documents']:
+                            if student_documents:
                                 # Create document status table
                                 doc_data = []
-                                for i, doc in enumerate(documents_results['documents']):
-                                    if doc:
-                                        doc_info = json.loads(doc)
-                                        doc_data.append({
-                                            "Document": doc_info.get('document_name', 'Unknown'),
-                                            "Status": doc_info.get('status', 'Unknown'),
-                                            "Uploaded": doc_info.get('upload_date', 'Unknown').split('T')[0]
-                                        })
+                                for doc_info in student_documents:
+                                    doc_data.append({
+                                        "Document": doc_info.get('document_name', 'Unknown'),
+                                        "Status": doc_info.get('status', 'Unknown'),
+                                        "Uploaded": doc_info.get('upload_date', 'Unknown').split('T')[0]
+                                    })
                                 
                                 if doc_data:
                                     st.table(pd.DataFrame(doc_data))
@@ -542,16 +811,13 @@ elif user_role == "admin":
                                 st.subheader("Evaluation Criteria")
                                 scores = shortlisting_results.get('scores', {})
                                 
-                                # Convert scores to DataFrame for better display
-                                score_data = []
-                                for key, value in scores.items():
-                                    if isinstance(value, (int, float)):
-                                        score_data.append({"Criterion": key, "Score": f"{value:.1f}"})
-                                    else:
-                                        score_data.append({"Criterion": key, "Score": value})
-                                
-                                if score_data:
-                                    st.table(pd.DataFrame(score_data))
+                                # Convert scores to DataFrame for better display, formatting numeric scores in one pass
+                                if scores:
+                                    # dtype=object keeps the Python numbers, so the isinstance check sees them as before
+                                    score_df = pd.Series(scores, name="Score", dtype=object).map(
+                                        lambda v: f"{v:.1f}" if isinstance(v, (int, float)) else v
+                                    ).rename_axis("Criterion").reset_index()
+                                    st.table(score_df)
                                 
                                 # Recommendation
                                 st.subheader("Recommendation")
@@ -569,9 +835,10 @@ elif user_role == "admin":
                                     # Show evaluation in progress
                                     with st.spinner("Evaluating application..."):
                                         # Run the shortlisting evaluation
-                                        result = asyncio.run(run_shortlisting_evaluation(app_id))
+                                        result = run_async(run_shortlisting_evaluation(app_id))
                                         
                                         if result:
+                                            invalidate_loaded_application(doc_id)
                                             st.success("Application re-evaluated successfully!")
                                             st.rerun()
                             else:
@@ -591,9 +858,10 @@ elif user_role == "admin":
                                         # Show evaluation in progress
                                         with st.spinner("Evaluating application..."):
                                             # Run the shortlisting evaluation
-                                            result = asyncio.run(run_shortlisting_evaluation(app_id))
+                                            result = run_async(run_shortlisting_evaluation(app_id))
                                             
                                             if result:
+                                                invalidate_loaded_application(doc_id)
                                                 st.success("Application evaluated successfully!")
                                                 st.rerun()
                         
@@ -616,13 +884,17 @@ elif user_role == "admin":
                                         st.success(f"Application {app_id} moved to Interview stage")
                                         st.rerun()
                             with col3:
-                                if st.button("Reject Application"):
+                                # A form keeps the reason and the confirmation in a single submit, so
+                                # typing the reason doesn't rerun the page and lose the nested button
+                                with st.form(f"reject_{app_id}"):
                                     reason = st.text_input("Rejection reason:")
-                                    if reason and st.button("Confirm Rejection"):
-                                        if update_application_status(selected_app_data['document_id'], "Rejected"):
-                                            # In a real system, you'd store the reason too
-                                            st.error(f"Application {app_id} has been rejected")
-                                            st.rerun()
+                                    submitted = st.form_submit_button("Reject Application")
+                                if submitted:
+                                    if not reason:
+                                        st.warning("Please enter a rejection reason")
+                                    elif update_application_status(selected_app_data['document_id'], "Rejected", reason=reason):
+                                        st.error(f"Application {app_id} has been rejected")
+                                        st.rerun()
                     else:
                         st.error("Could not retrieve application details")
         else:
@@ -634,33 +906,38 @@ elif user_role == "admin":
         # Program selection for batch shortlisting
         batch_program = st.selectbox(
             "Select Program for Batch Shortlisting",
-            ["All Programs", "Computer Science, B.Sc.", "Business Administration, B.B.A.", "Mechanical Engineering, B.Eng.", 
-             "Psychology, B.A.", "Data Science, M.Sc.", "MBA"]
+            BATCH_PROGRAMS
         )
         
         # Run batch shortlisting
         if st.button("Run Batch Shortlisting"):
             with st.spinner("Processing applications..."):
-                program = None if batch_program == "All Programs" else batch_program
-                results = asyncio.run(run_batch_shortlisting(program))
+                results = run_async(run_batch_shortlisting(None if batch_program == "All Programs" else batch_program))
+                forget_loaded_application()
                 
-                if results:
-                    st.success(f"Successfully evaluated {results.get('evaluated_count', 0)} applications")
-                    
-                    # Display results summary
-                    result_data = []
-                    for app_id, result in results.get('results', {}).items():
-                        result_data.append({
-                            "Application ID": app_id,
-                            "Status": result.get('status', 'Unknown'),
-                            "Score": result.get('overall_score', 'N/A'),
-                            "Recommendation": result.get('recommendation', 'N/A')[:50] + '...' if result.get('recommendation') and len(result.get('recommendation')) > 50 else result.get('recommendation', 'N/A')
-                        })
+                # Keep the run per program so reruns and tab switches re-render it without re-running the agent
+                st.session_state.setdefault('batch_results', {})[batch_program] = results
+        
+        results = st.session_state.get('batch_results', {}).get(batch_program)
+        if results:
+            st.success(f"Successfully evaluated {results.get('evaluated_count', 0)} applications")
                     
-                    if result_data:
-                        st.dataframe(pd.DataFrame(result_data))
-                    else:
-                        st.info("No applications were processed")
+            # Display results summary
+            batch_results = results.get('results', {})
+            if batch_results:
+                result_df = pd.DataFrame.from_records(
+                    [{"Application ID": app_id, **result} for app_id, result in batch_results.items()],
+                    columns=["Application ID", "status", "overall_score", "recommendation"]
+                )
+                result_df = result_df.fillna({"status": "Unknown", "overall_score": "N/A", "recommendation": "N/A"})
+                
+                # Shorten long recommendations in one vectorized pass
+                long_mask = result_df["recommendation"].str.len().gt(50)
+                result_df.loc[long_mask, "recommendation"] = result_df.loc[long_mask, "recommendation"].str.slice(0, 50) + '...'
+                
+                st.dataframe(result_df.rename(columns={"status": "Status", "overall_score": "Score", "recommendation": "Recommendation"}))
+            else:
+                st.info("No applications were processed")
         
         # Applications awaiting shortlisting
         st.subheader("Applications Ready for Shortlisting")
@@ -670,24 +947,18 @@ elif user_role == "admin":
         
         if shortlisting_apps:
             # Show in a concise format
-            shortlist_data = [{
-                "ID": app['id'],
-                "Name": app['name'],
-                "Program": app['program'],
-                "Date": app['date']
-            } for app in shortlisting_apps]
-            
-            st.dataframe(pd.DataFrame(shortlist_data))
+            st.dataframe(
+                shortlisting_apps,
+                column_order=["id", "name", "program", "date"],
+                column_config={"id": "ID", "name": "Name", "program": "Program", "date": "Date"}
+            )
             
             # Bulk action buttons
             if st.button("Mark All as Shortlisted"):
                 # Get applications ready for shortlisting
                 ready_apps = get_all_applications(status_filter="document_verification")
                 
-                count = 0
-                for app in ready_apps:
-                    if update_application_status(app['document_id'], "shortlisted"):
-                        count += 1
+                count = bulk_update_status([app['document_id'] for app in ready_apps], "shortlisted")
                 
                 if count > 0:
                     st.success(f"Marked {count} applications for shortlisting")
@@ -703,119 +974,121 @@ elif user_role == "admin":
         # Program selection for capacity check
         capacity_program = st.selectbox(
             "Select Program to Check Capacity",
-            ["Computer Science, B.Sc.", "Business Administration, B.B.A.", "Mechanical Engineering, B.Eng.", 
-             "Psychology, B.A.", "Data Science, M.Sc.", "MBA"]
+            PROGRAMS
         )
         
-        # Run capacity check
-        if st.button("Check Program Capacity"):
+        # Run capacity check, optionally together with batch shortlisting for the program
+        col1, col2 = st.columns(2)
+        with col1:
+            check_clicked = st.button("Check Program Capacity")
+        with col2:
+            combo_clicked = st.button("Shortlist Program and Check Capacity")
+        
+        if check_clicked or combo_clicked:
             with st.spinner("Analyzing program capacity..."):
-                result = asyncio.run(check_program_capacity(capacity_program))
+                if combo_clicked:
+                    batch_results, result = run_async(run_admin_combo(capacity_program))
+                    forget_loaded_application()
+                    if batch_results:
+                        st.success(f"Successfully evaluated {batch_results.get('evaluated_count', 0)} applications")
+                        st.session_state.setdefault('batch_results', {})[capacity_program] = batch_results
+                else:
+                    try:
+                        result = get_program_capacity(capacity_program)
+                    except RuntimeError:
+                        # The error has already been shown; the next click retries the check
+                        result = None
                 
-                if result:
-                    # Display capacity information
-                    st.success("Capacity analysis complete")
-                    
-                    # Create a visual representation of capacity
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.metric("Total Capacity", result.get('capacity', 'Unknown'))
-                        st.metric("Accepted Applications", result.get('accepted_count', 0))
-                        st.metric("Pending Applications", result.get('pending_count', 0))
-                        st.metric("Available Slots", result.get('available_slots', 0))
-                    
-                    with col2:
-                        # Create a simple pie chart using html/css
-                        accepted = result.get('accepted_count', 0)
-                        pending = result.get('pending_count', 0)
-                        available = result.get('available_slots', 0)
-                        total = accepted + pending + available
-                        
-                        if total > 0:
-                            accepted_pct = int(accepted / total * 100)
-                            pending_pct = int(pending / total * 100)
-                            available_pct = 100 - accepted_pct - pending_pct
-                            # Visual capacity display
-                            st.markdown(f"""
-                                <div style="width:100%; height:30px; border-radius:15px; overflow:hidden; display:flex">
-                                    <div style="width:{accepted_pct}%; height:100%; background-color:#ff4b4b; text-align:center; color:white">
-                                        {accepted_pct}%
-                                    </div>
-                                    <div style="width:{pending_pct}%; height:100%; background-color:#ffa64b; text-align:center; color:white">
-                                        {pending_pct}%
-                                    </div>
-                                    <div style="width:{available_pct}%; height:100%; background-color:#4bff4b; text-align:center; color:white">
-                                        {available_pct}%
-                                    </div>
-                                </div>
-                                <div style="display:flex; justify-content:space-between; width:100%; margin-top:5px">
-                                    <div>Accepted</div>
-                                    <div>Pending</div>
-                                    <div>Available</div>
-                                </div>
-                            """, unsafe_allow_html=True)
-                    
-                    # Display the analysis from the ShortlistingAgent
-                    st.subheader("Capacity Analysis")
-                    st.markdown(result.get('analysis', 'No analysis available'))
-                    
-                    # Add capacity management actions
-                    st.subheader("Capacity Management Actions")
-                    
-                    if result.get('available_slots', 0) <= 0:
-                        st.warning("This program has reached its capacity!")
-                        
-                        if st.button("Request Capacity Increase"):
-                            st.success("Capacity increase request has been submitted to the administration")
-                            # In a real system, this would trigger a notification or workflow
-                    
-                    # Display applications by priority
-                    st.subheader("Shortlisted Applications by Priority")
-                    
-                    # Get applications shortlisted for this program
-                    program_apps = get_all_applications(
-                        status_filter="shortlisted", 
-                        program_filter=capacity_program
-                    )
-                    
-                    if program_apps:
-                        # We'd need to get the shortlisting results for each application
-                        priority_apps = []
-                        for app in program_apps:
-                            full_app = get_document("admissions", app['document_id'])
-                            if full_app and 'shortlisting_results' in full_app:
-                                priority_apps.append({
-                                    "id": app['id'],
-                                    "name": app['name'],
-                                    "score": full_app['shortlisting_results'].get('overall_score', 0),
-                                    "document_id": app['document_id']
-                                })
-                        
-                        # Sort by score (highest first)
-                        priority_apps.sort(key=lambda x: x['score'], reverse=True)
+                # Keep the analysis per program so the actions below survive the rerun their buttons trigger
+                st.session_state.setdefault('capacity_results', {})[capacity_program] = result
+        
+        result = st.session_state.get('capacity_results', {}).get(capacity_program)
+        if result:
+            # Display capacity information
+            st.success("Capacity analysis complete")
+            
+            capacity = result.get('capacity', 'Unknown')
+            accepted = result.get('accepted_count', 0)
+            pending = result.get('pending_count', 0)
+            available_slots = result.get('available_slots', 0)
+            
+            # Create a visual representation of capacity
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.metric("Total Capacity", capacity)
+                st.metric("Accepted Applications", accepted)
+                st.metric("Pending Applications", pending)
+                st.metric("Available Slots", available_slots)
+            
+            with col2:
+                # Create a simple pie chart using html/css
+                total = accepted + pending + available_slots
+                
+                if total > 0:
+                    accepted_pct = int(accepted / total * 100)
+                    pending_pct = int(pending / total * 100)
+                    available_pct = 100 - accepted_pct - pending_pct
+                    # Visual capacity display
+                    st.markdown(f"""
+                        <div style="width:100%; height:30px; border-radius:15px; overflow:hidden; display:flex">
+                            <div style="width:{accepted_pct}%; height:100%; background-color:#ff4b4b; text-align:center; color:white">
+                                {accepted_pct}%
+                            </div>
+                            <div style="width:{pending_pct}%; height:100%; background-color:#ffa64b; text-align:center; color:white">
+                                {pending_pct}%
+                            </div>
+                            <div style="width:{available_pct}%; height:100%; background-color:#4bff4b; text-align:center; color:white">
+                                {available_pct}%
+                            </div>
+                        </div>
+                        <div style="display:flex; justify-content:space-between; width:100%; margin-top:5px">
+                            <div>Accepted</div>
+                            <div>Pending</div>
+                            <div>Available</div>
+                        </div>
+                    """, unsafe_allow_html=True)
+            
+            # Display the analysis from the ShortlistingAgent
+            st.subheader("Capacity Analysis")
+            st.markdown(result.get('analysis', 'No analysis available'))
+            
+            # Add capacity management actions
+            st.subheader("Capacity Management Actions")
+            
+            if available_slots <= 0:
+                st.warning("This program has reached its capacity!")
+                
+                if st.button("Request Capacity Increase"):
+                    st.success("Capacity increase request has been submitted to the administration")
+                    # In a real system, this would trigger a notification or workflow
+            
+            # Display applications by priority
+            st.subheader("Shortlisted Applications by Priority")
+            
+            # A full program has nothing to auto-accept, so only load the ranking when asked
+            if available_slots > 0 or st.checkbox("Show priority list anyway"):
+                # Evaluated, shortlisted applications for this program, already ordered by score
+                priority_apps = get_top_shortlisted(capacity_program)
+                
+                # Display as a table
+                if priority_apps:
+                    st.dataframe(pd.DataFrame({
+                        "id": [app['id'] for app in priority_apps],
+                        "name": [app['name'] for app in priority_apps],
+                        "score": [app['score'] for app in priority_apps]
+                    }))
                         
-                        # Display as a table
-                        if priority_apps:
-                            priority_df = pd.DataFrame(priority_apps)
-                            st.dataframe(priority_df[["id", "name", "score"]])
+                    # Auto-accept top applications based on available slots, skipping anything that scored zero
+                    to_accept = [app for app in priority_apps[:available_slots] if app['score'] > 0] if available_slots > 0 else []
+                    if to_accept and st.button(f"Auto-accept Top {len(to_accept)} Applications"):
+                        accepted_count = bulk_update_status([app['document_id'] for app in to_accept], "Accepted")
                             
-                            # Auto-accept top applications based on available slots
-                            available_slots = result.get('available_slots', 0)
-                            if available_slots > 0 and st.button(f"Auto-accept Top {min(available_slots, len(priority_apps))} Applications"):
-                                accepted_count = 0
-                                for i, app in enumerate(priority_apps):
-                                    if i < available_slots:
-                                        if update_application_status(app['document_id'], "Accepted"):
-                                            accepted_count += 1
-                                
-                                if accepted_count > 0:
-                                    st.success(f"Successfully accepted {accepted_count} top applications")
-                                    st.rerun()
-                        else:
-                            st.info("No shortlisted applications with evaluation results")
-                    else:
-                        st.info("No shortlisted applications for this program")
+                        if accepted_count > 0:
+                            st.success(f"Successfully accepted {accepted_count} top applications")
+                            st.rerun()
+                else:
+                    st.info("No shortlisted applications with evaluation results")
 
 else:
     # Not logged in view
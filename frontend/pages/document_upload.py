@@ -1,27 +1,56 @@
 ﻿import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import os
 import uuid
-import json
+import io
 import asyncio
+import shutil
+import time
+from functools import lru_cache
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 
 from components.sidebar import render_sidebar
 from components.header import render_header
 from components.footer import render_footer
-from backend.database.chroma_client import get_client,get_collection, add_document, get_document, query_documents, update_document
+from backend.database.chroma_client import get_collection, add_document, json_loads
 from backend.Agents.document_checker import DocumentCheckerAgent
 
-# Initialize the document checker agent
-document_checker = DocumentCheckerAgent()
+@st.cache_resource(show_spinner=False)
+def get_document_checker():
+    """Shared document checker agent, built once per process instead of on every rerun."""
+    return DocumentCheckerAgent()
+
+@st.cache_resource(show_spinner=False)
+def documents_col():
+    """Shared handle to the documents collection."""
+    return get_collection("documents")
 
 # Ensure uploads directory exists
 UPLOADS_DIR = "./uploads"
 os.makedirs(UPLOADS_DIR, exist_ok=True)
+# Uploads are copied to disk in 1 MiB chunks rather than as one in-memory buffer
+UPLOAD_CHUNK_SIZE = 1 << 20
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+# Status, rejection reason and the latest upload's date and path live in the document metadata,
+# which is the source of truth for them; the JSON body keeps the values it was created with
+METADATA_FIELDS = ("status", "reason", "upload_date", "file_path")
+
+def _document_from_result(doc, doc_id, metadata):
+    """Decode a stored document and overlay the current metadata-held fields."""
+    doc_data = json_loads(doc)
+    doc_data['id'] = doc_id
+    metadata = metadata or {}
+    doc_data.update({field: metadata[field] for field in METADATA_FIELDS if field in metadata})
+    return doc_data, metadata
 
+@st.cache_data(ttl=30, show_spinner=False)
 def get_documents_for_student(student_id):
-    """Retrieve all documents for a student."""
-    documents_collection = get_collection("documents")
+    """Retrieve all documents for a student, cached briefly so reruns don't re-read ChromaDB."""
+    documents_collection = documents_col()
     results = documents_collection.get(
         where={"student_id": student_id}
     )
@@ -29,47 +58,88 @@ def get_documents_for_student(student_id):
     documents = []
     for i, doc in enumerate(results['documents']):
         if doc:
-            doc_data = json.loads(doc)
-            doc_data['id'] = results['ids'][i]
-            doc_data['metadata'] = results['metadatas'][i] if results['metadatas'] else {}
+            doc_data, metadata = _document_from_result(doc, results['ids'][i], results['metadatas'][i] if results['metadatas'] else {})
+            doc_data['metadata'] = metadata
             documents.append(doc_data)
     
     return documents
 
+def _document_rows(results):
+    """Turn a metadata-only get into document rows (metadata plus id).
+    
+    Documents stored before upload_date and file_path were kept in metadata have their
+    JSON bodies loaded in one extra get.
+    """
+    rows = {
+        doc_id: dict(metadata or {}, id=doc_id)
+        for doc_id, metadata in zip(results['ids'], results['metadatas'] or [None] * len(results['ids']))
+    }
+    
+    legacy_ids = [doc_id for doc_id, row in rows.items() if "upload_date" not in row]
+    if legacy_ids:
+        legacy_results = documents_col().get(ids=legacy_ids, include=["metadatas", "documents"])
+        for doc_id, doc, metadata in zip(legacy_results['ids'], legacy_results['documents'], legacy_results['metadatas'] or [None] * len(legacy_results['ids'])):
+            if doc:
+                rows[doc_id], _ = _document_from_result(doc, doc_id, metadata)
+            else:
+                del rows[doc_id]
+    
+    return list(rows.values())
+
+# Columns of the admin verification report
+REPORT_COLUMNS = ("id", "student_id", "document_name", "status", "reason", "upload_date", "file_path")
+
+@st.cache_data(ttl=30, show_spinner=False)
+def get_all_documents():
+    """Retrieve every document for the admin overview as parallel columns, cached the same way."""
+    all_results = documents_col().get(include=["metadatas"])
+    
+    columns = {column: [] for column in REPORT_COLUMNS}
+    for row in _document_rows(all_results):
+        for column, values in columns.items():
+            values.append(row.get(column))
+    
+    return columns
+
+def clear_document_caches():
+    """Drop cached document lists after a write so the new status shows up immediately."""
+    get_documents_for_student.clear()
+    get_all_documents.clear()
+
+def _status_metadata(status, reason=None):
+    """Metadata fields to write for a status change."""
+    metadata = {"status": status}
+    if reason:
+        metadata["reason"] = reason
+    return metadata
+
 def update_document_status(document_id, status, reason=None):
-    """Update the status of a document."""
-    documents_collection = get_collection("documents")
+    """Update the status of a document. Returns False if the document doesn't exist."""
+    if not documents_col().get(ids=[document_id], include=[])["ids"]:
+        return False
+    return bulk_update_document_status([(document_id, status, reason)]) > 0
+
+def bulk_update_document_status(updates):
+    """Apply (document_id, status, reason) updates with one metadata-only update call. Returns the number updated."""
+    if not updates:
+        return 0
     
-    # Get the existing document
-    result = documents_collection.get(ids=[document_id])
-    if result and result['documents'] and result['documents'][0]:
-        doc_data = json.loads(result['documents'][0])
-        
-        # Update the status and reason
-        doc_data['status'] = status
-        if reason:
-            doc_data['reason'] = reason
-        
-        # Update metadata
-        metadata = result['metadatas'][0] if result['metadatas'] and result['metadatas'][0] else {}
-        metadata['status'] = status
-        if reason:
-            metadata['reason'] = reason
-        
-        # Update the document in the collection
-        documents_collection.update(
-            ids=[document_id],
-            documents=[json.dumps(doc_data)],
-            metadatas=[metadata]
-        )
-        return True
-    return False
+    documents_collection = documents_col()
+    
+    # Chroma merges partial metadata on update, so nothing needs to be read first
+    # and the JSON bodies are left untouched
+    documents_collection.update(
+        ids=[document_id for document_id, _, _ in updates],
+        metadatas=[_status_metadata(status, reason) for _, status, reason in updates]
+    )
+    clear_document_caches()
+    return len(updates)
 
 async def process_document_verification(document_id):
     """Process document verification using AI agent."""
     try:
         # Get the document to verify
-        result = await document_checker.verify_document(document_id)
+        result = await get_document_checker().verify_document(document_id)
         
         # Update document status based on verification result
         verification_status = result.get("verification_status", "Pending")
@@ -93,16 +163,49 @@ async def process_document_verification(document_id):
         st.error(f"Error during document verification: {str(e)}")
         return "Pending"
 
+@st.cache_resource(show_spinner=False)
+def get_upload_writer():
+    """Shared thread pool for writing uploads to disk off the script thread."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="upload-writer")
+
+def save_uploaded_file(uploaded_file, file_path):
+    """Stream an uploaded file to disk in UPLOAD_CHUNK_SIZE chunks."""
+    uploaded_file.seek(0)
+    with open(file_path, "wb", buffering=UPLOAD_CHUNK_SIZE) as f:
+        shutil.copyfileobj(uploaded_file, f, UPLOAD_CHUNK_SIZE)
+        f.flush()
+        # Uploads aren't read back soon, so let the OS drop them from the page cache (Linux only)
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+
+@lru_cache(maxsize=1)
+def _timestamp_for_second(second):
+    return datetime.fromtimestamp(second).isoformat()
+
+def upload_timestamp():
+    """ISO timestamp for an upload, formatted once per second."""
+    return _timestamp_for_second(int(time.time()))
+
 def handle_document_upload(student_id, doc_name, uploaded_file, existing_doc_id=None):
     """Handle document upload and initiate verification process."""
     if not uploaded_file:
         return False
     
-    # Save file to disk
+    # Validate up front so a rejected file costs neither a disk write nor a database insert
+    if uploaded_file.size > MAX_UPLOAD_BYTES:
+        st.error(f"{doc_name} exceeds the 10MB file size limit")
+        return False
+    if uploaded_file.type != "application/pdf":
+        st.error(f"{doc_name} must be a PDF file")
+        return False
+    
+    # Save file to disk in the background while the database record is written
     safe_doc_name = doc_name.replace("/", "_") 
     file_path = f"{UPLOADS_DIR}/{student_id}_{safe_doc_name}.pdf"
-    with open(file_path, "wb") as f:
-        f.write(uploaded_file.getbuffer())
+    write_future = get_upload_writer().submit(save_uploaded_file, uploaded_file, file_path)
     
     # Create document data
     doc_data = {
@@ -110,13 +213,26 @@ def handle_document_upload(student_id, doc_name, uploaded_file, existing_doc_id=
         "document_name": doc_name,
         "file_path": file_path,
         "status": "Pending",
-        "upload_date": datetime.now().isoformat(),
+        "upload_date": upload_timestamp(),
     }
     
-    # Add or update document in ChromaDB
-    if existing_doc_id:
-        # Update existing document
-        update_document_status(existing_doc_id, "Pending")
+    # Add or update document in ChromaDB, keeping what the record held before in case the file write fails
+    previous = documents_col().get(ids=[existing_doc_id], include=["metadatas"]) if existing_doc_id else None
+    if previous and previous["ids"]:
+        # Update existing document with the new upload, back to Pending
+        previous_metadata = {
+            field: value for field, value in (previous["metadatas"][0] or {}).items()
+            if field in ("status", "upload_date", "file_path")
+        }
+        documents_col().update(
+            ids=[existing_doc_id],
+            metadatas=[{
+                "status": "Pending",
+                "upload_date": doc_data["upload_date"],
+                "file_path": file_path
+            }]
+        )
+        clear_document_caches()
         document_id = existing_doc_id
     else:
         # Add new document
@@ -128,9 +244,26 @@ def handle_document_upload(student_id, doc_name, uploaded_file, existing_doc_id=
             metadata={
                 "student_id": student_id,
                 "document_name": doc_name,
-                "status": "Pending"
+                "status": "Pending",
+                "upload_date": doc_data["upload_date"],
+                "file_path": file_path
             }
         )
+        clear_document_caches()
+    
+    # The file must be fully on disk before it can be verified
+    try:
+        write_future.result()
+    except Exception as e:
+        # Don't leave a record pointing at a file that was never written
+        if existing_doc_id == document_id:
+            if previous_metadata:
+                documents_col().update(ids=[document_id], metadatas=[previous_metadata])
+        else:
+            documents_col().delete(ids=[document_id])
+        clear_document_caches()
+        st.error(f"Error saving {doc_name}: {str(e)}")
+        return False
     
     # Schedule verification (we can't directly use asyncio.create_task in Streamlit)
     # Instead, store the task in session state for later processing
@@ -146,16 +279,54 @@ def handle_document_upload(student_id, doc_name, uploaded_file, existing_doc_id=
     
     return document_id
 
+# Simulated verification outcomes used by the demo verification paths
+QUEUE_STATUSES = ["Verified", "Rejected", "Pending"]
+QUEUE_STATUS_WEIGHTS = [0.7, 0.2, 0.1]  # 70% chance of verification, 20% rejection, 10% pending
+QUEUE_REJECTION_REASONS = [
+    "Document appears to be altered or tampered with",
+    "Document is not legible",
+    "Document is expired",
+    "Document does not match student information",
+    "Document is missing required information"
+]
+AI_REJECTION_REASONS = [
+    "AI detected potential document alteration",
+    "AI detected inconsistency with student records",
+    "Document does not meet quality requirements",
+    "Missing crucial information"
+]
+AI_INSIGHTS = [
+    "Document appears to be authentic",
+    "No signs of tampering detected",
+    "Student information matches our records",
+    "Document follows expected format",
+    "Some areas have low resolution but still readable"
+]
+
+# Completed verification tasks kept in session state before older ones are evicted
+RECENT_VERIFICATIONS_LIMIT = 50
+
 def process_verification_queue():
     """Process any queued verification tasks"""
     if "verification_tasks" not in st.session_state:
         return
     
+    if "recent_verifications" not in st.session_state:
+        st.session_state.recent_verifications = deque(maxlen=RECENT_VERIFICATIONS_LIMIT)
+    recent_verifications = st.session_state.recent_verifications
+    
     # Process up to 3 tasks at a time
     tasks_to_process = [task for task_id, task in st.session_state.verification_tasks.items() 
                         if task["status"] == "queued"][:3]
     
-    for task in tasks_to_process:
+    # For demo purposes, statuses are random; draw them (and rejection reasons) for the whole batch at once
+    rng = np.random.default_rng()
+    new_statuses = rng.choice(QUEUE_STATUSES, size=len(tasks_to_process), p=QUEUE_STATUS_WEIGHTS)
+    reasons = rng.choice(QUEUE_REJECTION_REASONS, size=len(tasks_to_process))
+    
+    # Status changes are collected and written in one batch after the loop
+    updates = []
+    for task, new_status, reason in zip(tasks_to_process, new_statuses.tolist(), reasons.tolist()):
         document_id = task["document_id"]
         
         # Mark as processing
@@ -165,28 +336,44 @@ def process_verification_queue():
         # In a production app, you would use a background worker or queue system
         st.info(f"AI is now verifying your {task['document_name']}. This may take a moment...")
         
-        # For demo purposes, we'll just set a random status
-        import random
-        statuses = ["Verified", "Rejected", "Pending"]
-        weights = [0.7, 0.2, 0.1]  # 70% chance of verification, 20% rejection, 10% pending
-        new_status = random.choices(statuses, weights=weights, k=1)[0]
-        
         if new_status == "Rejected":
-            reasons = [
-                "Document appears to be altered or tampered with",
-                "Document is not legible",
-                "Document is expired",
-                "Document does not match student information",
-                "Document is missing required information"
-            ]
-            reason = random.choice(reasons)
-            update_document_status(document_id, new_status, reason)
+            updates.append((document_id, new_status, reason))
         else:
-            update_document_status(document_id, new_status)
+            updates.append((document_id, new_status, None))
         
         # Mark as completed
         st.session_state.verification_tasks[document_id]["status"] = "completed"
         st.session_state.verification_tasks[document_id]["result"] = new_status
+        recent_verifications.append(document_id)
+    
+    bulk_update_document_status(updates)
+    
+    # Forget completed tasks that have dropped out of the recent window so the session doesn't keep growing
+    recent_ids = set(recent_verifications)
+    for task_id in [task_id for task_id, task in st.session_state.verification_tasks.items()
+                    if task["status"] == "completed" and task_id not in recent_ids]:
+        del st.session_state.verification_tasks[task_id]
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _perf_metrics():
+    """Simulated accuracy, false positive/negative rates and processing time, drawn in one call."""
+    rng = np.random.default_rng()
+    return tuple(rng.uniform([0.92, 0.01, 0.01, 10], [0.98, 0.04, 0.03, 30]).tolist())
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _perf_chart_data():
+    """Simulated two-week verification history, indexed by date."""
+    rng = np.random.default_rng()
+    dates = pd.date_range(end=datetime.now(), periods=14).strftime('%Y-%m-%d').tolist()
+    verified = rng.integers(15, 50, size=14).tolist()
+    rejected = rng.integers(2, 10, size=14).tolist()
+    
+    chart_data = pd.DataFrame({
+        'Date': dates,
+        'Verified': verified,
+        'Rejected': rejected
+    })
+    return chart_data.set_index('Date')
 
 # Render sidebar and header
 render_sidebar()
@@ -228,7 +415,11 @@ if user_role == "student":
     
     # Fetch document statuses from database
     documents = get_documents_for_student(student_id)
-    document_status = {doc['document_name']: {"status": doc['status'], "uploaded": True, "id": doc['id'], "reason": doc.get('reason')} for doc in documents}
+    document_status = {}
+    status_counts = Counter()
+    for doc in documents:
+        document_status[doc['document_name']] = {"status": doc['status'], "uploaded": True, "id": doc['id'], "reason": doc.get('reason')}
+        status_counts[doc.get('status')] += 1
 
     # Display document list with upload options
     for doc_name in required_documents:
@@ -241,40 +432,39 @@ if user_role == "student":
                 if st.button(f"Replace {doc_name}", key=f"replace_{doc_name}"):
                     uploaded_file = st.file_uploader(f"Upload new {doc_name}", type=['pdf'], key=f"upload_{doc_name}")
                     if uploaded_file:
-                        handle_document_upload(student_id, doc_name, uploaded_file, doc_info['id'])
-                        st.success(f"New {doc_name} uploaded successfully. Our AI system will verify it shortly.")
-                        st.rerun()
+                        if handle_document_upload(student_id, doc_name, uploaded_file, doc_info['id']):
+                            st.success(f"New {doc_name} uploaded successfully. Our AI system will verify it shortly.")
+                            st.rerun()
             
             elif doc_info['status'] == 'Rejected':
                 st.error(f"❌ Your {doc_name} was rejected by our AI verification system. Reason: {doc_info.get('reason', 'Not specified')}")
                 uploaded_file = st.file_uploader(f"Upload new {doc_name}", type=['pdf'], key=f"upload_{doc_name}")
                 if uploaded_file:
-                    handle_document_upload(student_id, doc_name, uploaded_file, doc_info['id'])
-                    st.success(f"New {doc_name} uploaded successfully. Our AI system will verify it shortly.")
-                    st.rerun()
+                    if handle_document_upload(student_id, doc_name, uploaded_file, doc_info['id']):
+                        st.success(f"New {doc_name} uploaded successfully. Our AI system will verify it shortly.")
+                        st.rerun()
             
             elif doc_info['status'] == 'Pending':
                 st.info(f"⏳ Your {doc_name} is being processed by our AI verification system. This usually takes 1-2 minutes.")
                 # Check if we have a task in progress
-                if "verification_tasks" in st.session_state:
-                    for task_id, task in st.session_state.verification_tasks.items():
-                        if task["document_id"] == doc_info['id'] and task["status"] == "processing":
-                            st.info("AI verification in progress...")
-                            st.progress(0.5)
+                task = st.session_state.get("verification_tasks", {}).get(doc_info['id'])
+                if task and task["status"] == "processing":
+                    st.info("AI verification in progress...")
+                    st.progress(0.5)
             
             else:
                 if not doc_info['uploaded']:
                     uploaded_file = st.file_uploader(f"Upload {doc_name}", type=['pdf'], key=f"upload_{doc_name}")
                     if uploaded_file:
-                        handle_document_upload(student_id, doc_name, uploaded_file)
-                        st.success(f"{doc_name} uploaded successfully. Our AI system will verify it shortly.")
-                        st.rerun()
+                        if handle_document_upload(student_id, doc_name, uploaded_file):
+                            st.success(f"{doc_name} uploaded successfully. Our AI system will verify it shortly.")
+                            st.rerun()
                 else:
                     st.info(f"⏳ Your {doc_name} is pending AI verification")
     
     # Document verification status
     st.subheader("Document Verification Status")
-    verified_count = sum(1 for doc in documents if doc.get('status') == "Verified")
+    verified_count = status_counts["Verified"]
     total_required = len(required_documents)
     progress_percentage = verified_count / total_required if total_required > 0 else 0
     
@@ -299,126 +489,105 @@ elif user_role == "admin":
     
     with tab1:
         # Query all pending documents
-        documents_collection = get_collection("documents")
-        pending_results = documents_collection.get(
-            where={"status": "Pending"}
+        # Query all pending documents, metadata only
+        pending_results = documents_col().get(
+            where={"status": "Pending"},
+            include=["metadatas"]
         )
+        pending_docs = _document_rows(pending_results)
         
-        if pending_results and pending_results['documents']:
-            st.write(f"Found {len(pending_results['documents'])} documents pending verification")
+        if pending_docs:
+            st.write(f"Found {len(pending_docs)} documents pending verification")
+            
+            # Simulated AI scores for every pending document, drawn in one go
+            rng = np.random.default_rng()
+            pending_count = len(pending_docs)
+            confidences = rng.uniform(0.7, 0.98, size=pending_count)
+            insight_picks = rng.permuted(np.tile(np.arange(len(AI_INSIGHTS)), (pending_count, 1)), axis=1)[:, :3]
             
             # Display each pending document
-            for i, doc in enumerate(pending_results['documents']):
-                if doc:
-                    doc_data = json.loads(doc)
-                    doc_id = pending_results['ids'][i]
+            for i, doc_data in enumerate(pending_docs):
+                doc_id = doc_data['id']
+                
+                with st.expander(f"{doc_data['document_name']} - Student ID: {doc_data['student_id']}"):
+                    st.write(f"Uploaded on: {doc_data['upload_date']}")
+                    st.write(f"File path: {doc_data['file_path']}")
                     
-                    with st.expander(f"{doc_data['document_name']} - Student ID: {doc_data['student_id']}"):
-                        st.write(f"Uploaded on: {doc_data['upload_date']}")
-                        st.write(f"File path: {doc_data['file_path']}")
-                        
-                        col1, col2, col3 = st.columns(3)
-                        
-                        with col1:
-                            if st.button("AI Verify", key=f"ai_verify_{doc_id}"):
-                                st.info("AI verification in progress...")
-                                
-                                # For demo purposes - simulate AI verification
-                                import random
-                                import time
-                                time.sleep(1)  # Simulate processing time
-                                
-                                statuses = ["Verified", "Rejected"]
-                                weights = [0.8, 0.2]  # 80% chance of verification
-                                new_status = random.choices(statuses, weights=weights, k=1)[0]
-                                
-                                if new_status == "Rejected":
-                                    reasons = [
-                                        "AI detected potential document alteration",
-                                        "AI detected inconsistency with student records",
-                                        "Document does not meet quality requirements",
-                                        "Missing crucial information"
-                                    ]
-                                    reason = random.choice(reasons)
-                                    update_document_status(doc_id, new_status, reason)
-                                    st.error(f"AI rejected document: {reason}")
-                                else:
-                                    update_document_status(doc_id, new_status)
-                                    st.success("AI verified document successfully!")
-                                st.rerun()
-                        
-                        with col2:
-                            if st.button("Manual Verify", key=f"verify_{doc_id}"):
-                                update_document_status(doc_id, "Verified")
-                                st.success("Document manually verified!")
-                                st.rerun()
-                        
-                        with col3:
-                            if st.button("Reject Document", key=f"reject_{doc_id}"):
-                                reason = st.text_input("Rejection reason:", key=f"reason_{doc_id}")
-                                if reason and st.button("Confirm Rejection", key=f"confirm_reject_{doc_id}"):
-                                    update_document_status(doc_id, "Rejected", reason)
-                                    st.error("Document rejected.")
-                                    st.rerun()
-                        
-                        # Show AI confidence score (simulated)
-                        if ai_auto_verify:
-                            import random
-                            confidence = random.uniform(0.7, 0.98)
-                            st.metric("AI Confidence Score", f"{confidence:.2f}")
+                    col1, col2, col3 = st.columns(3)
+                    
+                    with col1:
+                        if st.button("AI Verify", key=f"ai_verify_{doc_id}"):
+                            st.info("AI verification in progress...")
+                            
+                            # For demo purposes - simulate AI verification
+                            time.sleep(1)  # Simulate processing time
                             
-                            # AI insights (simulated)
-                            insights = [
-                                "Document appears to be authentic",
-                                "No signs of tampering detected",
-                                "Student information matches our records",
-                                "Document follows expected format",
-                                "Some areas have low resolution but still readable"
-                            ]
+                            new_status = str(rng.choice(["Verified", "Rejected"], p=[0.8, 0.2]))  # 80% chance of verification
                             
-                            st.subheader("AI Analysis")
-                            for insight in random.sample(insights, 3):
-                                st.write(f"- {insight}")
+                            if new_status == "Rejected":
+                                reason = str(rng.choice(AI_REJECTION_REASONS))
+                                update_document_status(doc_id, new_status, reason)
+                                st.error(f"AI rejected document: {reason}")
+                            else:
+                                update_document_status(doc_id, new_status)
+                                st.success("AI verified document successfully!")
+                            st.rerun()
+                    
+                    with col2:
+                        if st.button("Manual Verify", key=f"verify_{doc_id}"):
+                            update_document_status(doc_id, "Verified")
+                            st.success("Document manually verified!")
+                            st.rerun()
+                    
+                    with col3:
+                        if st.button("Reject Document", key=f"reject_{doc_id}"):
+                            reason = st.text_input("Rejection reason:", key=f"reason_{doc_id}")
+                            if reason and st.button("Confirm Rejection", key=f"confirm_reject_{doc_id}"):
+                                update_document_status(doc_id, "Rejected", reason)
+                                st.error("Document rejected.")
+                                st.rerun()
+                    
+                    # Show AI confidence score (simulated)
+                    if ai_auto_verify:
+                        st.metric("AI Confidence Score", f"{confidences[i]:.2f}")
+                        
+                        # AI insights (simulated)
+                        st.subheader("AI Analysis")
+                        for insight_index in insight_picks[i]:
+                            st.write(f"- {AI_INSIGHTS[insight_index]}")
         else:
             st.info("No documents pending verification")
     
     with tab2:
         # Get all documents
-        all_results = documents_collection.get()
+        all_docs = get_all_documents()
         
-        if all_results and all_results['documents']:
+        if all_docs["id"]:
             # Convert to dataframe for better display
-            all_docs = []
-            for i, doc in enumerate(all_results['documents']):
-                if doc:
-                    doc_data = json.loads(doc)
-                    doc_data['id'] = all_results['ids'][i]
-                    all_docs.append(doc_data)
+            df = pd.DataFrame(all_docs)
+            df["status"] = df["status"].astype("category")
             
-            if all_docs:
-                df = pd.DataFrame(all_docs)
-                
-                # Add verification stats
-                verified_count = sum(1 for doc in all_docs if doc.get('status') == "Verified")
-                rejected_count = sum(1 for doc in all_docs if doc.get('status') == "Rejected")
-                pending_count = sum(1 for doc in all_docs if doc.get('status') == "Pending")
-                
-                col1, col2, col3 = st.columns(3)
-                col1.metric("Verified Documents", verified_count)
-                col2.metric("Rejected Documents", rejected_count)
-                col3.metric("Pending Documents", pending_count)
-                
-                # Show the dataframe
-                st.dataframe(df)
-                
-                # Add option to download verification report
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    label="Download Verification Report",
-                    data=csv,
-                    file_name="document_verification_report.csv",
-                    mime="text/csv",
-                )
+            # Add verification stats
+            status_counts = Counter(all_docs["status"])
+            
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Verified Documents", status_counts["Verified"])
+            col2.metric("Rejected Documents", status_counts["Rejected"])
+            col3.metric("Pending Documents", status_counts["Pending"])
+            
+            # Show the dataframe
+            st.dataframe(df)
+            
+            # Add option to download verification report
+            csv_buffer = io.BytesIO()
+            df.to_csv(csv_buffer, index=False, chunksize=1000)
+            csv_buffer.seek(0)
+            st.download_button(
+                label="Download Verification Report",
+                data=csv_buffer,
+                file_name="document_verification_report.csv",
+                mime="text/csv",
+            )
         else:
             st.info("No documents found in the database")
     
@@ -427,11 +596,7 @@ elif user_role == "admin":
         st.subheader("AI Verification Performance")
         
         # Simulated data
-        import random
-        accuracy = random.uniform(0.92, 0.98)
-        false_positives = random.uniform(0.01, 0.04)
-        false_negatives = random.uniform(0.01, 0.03)
-        avg_time = random.uniform(10, 30)
+        accuracy, false_positives, false_negatives, avg_time = _perf_metrics()
         
         col1, col2, col3, col4 = st.columns(4)
         col1.metric("Accuracy", f"{accuracy:.2%}")
@@ -440,20 +605,7 @@ elif user_role == "admin":
         col4.metric("Avg. Process Time", f"{avg_time:.1f}s")
         
         # Simulated chart for verification history
-        import numpy as np
-        
-        # Generate random data for chart
-        dates = pd.date_range(end=datetime.now(), periods=14).strftime('%Y-%m-%d').tolist()
-        verified = np.random.randint(15, 50, size=14).tolist()
-        rejected = np.random.randint(2, 10, size=14).tolist()
-        
-        chart_data = pd.DataFrame({
-            'Date': dates,
-            'Verified': verified,
-            'Rejected': rejected
-        })
-        
-        st.line_chart(chart_data.set_index('Date'))
+        st.line_chart(_perf_chart_data())
 else:
     # Not logged in view
     st.warning("Please log in with admin credentials to access the verification dashboard")
@@ -1,9 +1,9 @@
 ﻿import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import json
-import uuid
+import os
 from datetime import datetime
 
 from components.sidebar import render_sidebar
@@ -20,107 +20,342 @@ render_header("Financial Aid & Loan Application", "Explore financial options for
 # Check if user is logged in and their role
 user_role = st.session_state.get("user_role")
 
-# Initialize database if not already done
-if "db_initialized" not in st.session_state:
+# Initialize the database once per process, shared by every session
+@st.cache_resource(show_spinner=False)
+def get_db():
     db.initialize_chroma_db()
-    st.session_state.db_initialized = True
+    return db
+
+_db = get_db()
+
+# Loan metadata invariant: student_id, status and loan_type are always str and amount is always float.
+# Chroma filters compare against one value type, so a loan written with e.g. an int amount
+# would silently drop out of the amount range filter. Build metadata with _loan_metadata().
+def _loan_metadata(loan_data):
+    """Typed metadata for a loan document"""
+    return {
+        "student_id": str(loan_data["student_id"]),
+        "status": str(loan_data["status"]),
+        "loan_type": str(loan_data["loan_type"]),
+        "amount": float(loan_data["loan_amount"])
+    }
+
+def _load_loans(**query):
+    """Fetch loan documents, taking the status from metadata since status changes only update metadata"""
+    loans = []
+    for loan, metadata in _db.find_documents("loans", **query):
+        if "status" in metadata:
+            loan["status"] = metadata["status"]
+        loans.append(loan)
+    return loans
 
 def load_loan_application(student_id):
     """Load loan application for a specific student"""
-    loan_applications = db.query_documents(
-        collection_name="loans",
-        query="",  # Empty query to match all documents
-        metadata_filter={"student_id": student_id}
-    )
+    loan_applications = _load_loans(where={"student_id": student_id}, limit=1)
     if loan_applications:
         return loan_applications[0]  # Return the first matching application
     return None
 
 def save_loan_application(loan_data):
     """Save loan application to database"""
+    # The ID's date part and the submission date come from the same clock reading
+    now = datetime.now()
+    
     # Generate unique ID if not provided
     if "document_id" not in loan_data:
-        loan_data["document_id"] = f"L{datetime.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:6]}"
+        loan_data["document_id"] = now.strftime("L%Y%m%d") + os.urandom(3).hex()
     
     # Add submission timestamp
     if "submitted_date" not in loan_data:
-        loan_data["submitted_date"] = datetime.now().strftime("%Y-%m-%d")
+        loan_data["submitted_date"] = now.strftime("%Y-%m-%d")
     
     # Set initial status if not provided
     if "status" not in loan_data:
         loan_data["status"] = "Pending"
     
     # Save to database
-    db.add_document(
+    _db.add_document(
         collection_name="loans",
         document=loan_data,
         document_id=loan_data["document_id"],
-        metadata={
-            "student_id": loan_data["student_id"],
-            "status": loan_data["status"],
-            "loan_type": loan_data["loan_type"],
-            "amount": loan_data["loan_amount"]
-        }
+        metadata=_loan_metadata(loan_data)
     )
+    clear_loan_caches()
     return loan_data["document_id"]
 
 def update_loan_status(document_id, new_status):
     """Update the status of a loan application"""
-    loan_data = db.get_document("loans", document_id)
-    if loan_data:
-        loan_data["status"] = new_status
-        db.update_document(
-            collection_name="loans",
-            document_id=document_id,
-            document=loan_data,
-            metadata={
-                "student_id": loan_data["student_id"],
-                "status": new_status,
-                "loan_type": loan_data["loan_type"],
-                "amount": loan_data["loan_amount"]
-            }
-        )
-        return True
-    return False
+    if not _db.get_collection("loans").get(ids=[document_id], include=[])["ids"]:
+        return False
+    # Only the status changes, so leave the stored document (and its embedding) alone
+    _db.update_metadata("loans", document_id, {"status": str(new_status)})
+    clear_loan_caches()
+    return True
 
-def load_all_loan_applications(status_filter=None, loan_type_filter=None, min_amount=0, max_amount=100000):
-    """Load all loan applications with optional filters"""
-    metadata_filter = {}
+# Rows per page on the admin dashboard
+LOAN_PAGE_SIZE = 25
+
+def _loan_filter(status_filter=None, loan_type_filter=None, min_amount=0, max_amount=100000):
+    """Build the Chroma where clause for the loan list filters"""
+    # Amount is stored as float metadata, so compare against float bounds
+    where = {"$and": [
+        {"amount": {"$gte": float(min_amount)}},
+        {"amount": {"$lte": float(max_amount)}},
+    ]}
     
     if status_filter and status_filter != "All":
-        metadata_filter["status"] = status_filter
+        where["$and"].append({"status": status_filter})
     
     if loan_type_filter and loan_type_filter != "All":
-        metadata_filter["loan_type"] = loan_type_filter
-    
-    # Note: ChromaDB doesn't support range queries directly, so we'll filter by amount after retrieval
+        where["$and"].append({"loan_type": loan_type_filter})
     
-    # Query with any applicable filters
-    loan_applications = db.query_documents(
-        collection_name="loans",
-        query="",  # Empty query to match all documents
-        n_results=100,  # Adjust as needed
-        metadata_filter=metadata_filter if metadata_filter else None
+    return where
+
+@st.cache_data(ttl=60, show_spinner=False)
+def _fetch_all_loans(status_filter=None, loan_type_filter=None, min_amount=0, max_amount=100000, offset=0, limit=100):
+    """Fetch one page of loan applications matching the filters (cached per filter combination and page)"""
+    # All filters are applied by ChromaDB
+    return _load_loans(
+        where=_loan_filter(status_filter, loan_type_filter, min_amount, max_amount),
+        offset=offset,
+        limit=limit
     )
-    
-    # Apply amount filter manually
-    if loan_applications:
-        filtered_applications = [
-            app for app in loan_applications 
-            if min_amount <= app.get("loan_amount", 0) <= max_amount
-        ]
-        return filtered_applications
-    
-    return []
 
-def load_financial_aid_options():
-    """Load financial aid options from database"""
-    return db.query_documents(
+@st.cache_data(ttl=60, show_spinner=False)
+def count_loan_applications(status_filter=None, loan_type_filter=None, min_amount=0, max_amount=100000):
+    """Count loan applications matching the filters without loading them"""
+    # collection.count() can't take a filter, so fetch only the matching ids
+    where = _loan_filter(status_filter, loan_type_filter, min_amount, max_amount)
+    return len(_db.get_collection("loans").get(where=where, include=[])["ids"])
+
+@st.cache_resource(show_spinner=False)
+def _loan_cache_version():
+    """Process-wide counter bumped on every loan write, so per-session dashboard views know to rebuild"""
+    return {"version": 0}
+
+def clear_loan_caches():
+    """Drop cached loan lists and counts after a write"""
+    _fetch_all_loans.clear()
+    count_loan_applications.clear()
+    _loan_cache_version()["version"] += 1
+
+def load_all_loan_applications(status_filter=None, loan_type_filter=None, min_amount=0, max_amount=100000, offset=0, limit=100):
+    """Load all loan applications with optional filters"""
+    return _fetch_all_loans(status_filter, loan_type_filter, min_amount, max_amount, offset, limit)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_aid_options():
+    """Fetch financial aid options from database (cached, they rarely change)"""
+    return _db.query_documents(
         collection_name="eligibility_criteria",
         query="financial aid",
         n_results=10
     )
 
+def load_financial_aid_options():
+    """Load financial aid options from database"""
+    return _fetch_aid_options()
+
+def _amortize(principal, monthly_rate, months):
+    """Fixed monthly payment for a loan"""
+    if monthly_rate == 0:
+        return principal / months
+    growth = (1.0 + monthly_rate) ** months
+    return principal * monthly_rate * growth / (growth - 1.0)
+
+def _loan_table(loan_applications):
+    """Admin table for a page of loan applications, with risk columns"""
+    # Extract relevant fields for the table, one column at a time
+    df = pd.DataFrame({
+        "id": [app.get("document_id", "") for app in loan_applications],
+        "student_id": [app.get("student_id", "") for app in loan_applications],
+        "type": pd.Categorical([app.get("loan_type", "") for app in loan_applications]),
+        "amount": np.fromiter((app.get("loan_amount", 0) for app in loan_applications), dtype=np.float64, count=len(loan_applications)),
+        "date": [app.get("submitted_date", "") for app in loan_applications],
+        "status": pd.Categorical([app.get("status", "") for app in loan_applications]),
+        "annual_income": np.fromiter((app.get("annual_income", 0) for app in loan_applications), dtype=np.float64, count=len(loan_applications)),
+        "existing_debt": np.fromiter((app.get("existing_debt", 0) for app in loan_applications), dtype=np.float64, count=len(loan_applications))
+    })
+    return add_risk_columns(df)
+
+# Risk levels by score band (scores below 40 are high risk, 70 and above low risk)
+RISK_BINS = [0, 40, 70, np.inf]
+RISK_LEVELS = ["High Risk", "Moderate Risk", "Low Risk"]
+RISK_ASSESSMENT = {
+    "Low Risk": (
+        ["Strong financial position", "Good debt-to-income ratio", "Loan amount appropriate for circumstances"],
+        "Approve with standard terms"
+    ),
+    "Moderate Risk": (
+        ["Acceptable financial position", "Moderate debt-to-income ratio", "Consider reduced loan amount"],
+        "Approve with conditions"
+    ),
+    "High Risk": (
+        ["Weak financial position", "High debt-to-income ratio", "Loan amount may be too high"],
+        "Deny"
+    ),
+}
+
+def add_risk_columns(df):
+    """Add risk_score/risk_level columns computed for every loan in one pass"""
+    # Simple risk score calculation (would be more sophisticated in production)
+    income = df["annual_income"].where(df["annual_income"] > 0)
+    debt_ratio = (df["amount"] + df["existing_debt"]) / income
+    df["risk_score"] = np.clip(100 - debt_ratio * 20, 0, 100).fillna(50)  # Default moderate risk for no income
+    df["risk_level"] = pd.cut(df["risk_score"], RISK_BINS, labels=RISK_LEVELS, right=False)
+    return df
+
+def _admin_dashboard():
+    st.subheader("Loan Applications Dashboard")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        status_filter = st.selectbox("Filter by Status", ["All", "Pending", "Under Review", "Approved", "Denied", "Awaiting Documents"])
+    with col2:
+        loan_type_filter = st.selectbox("Filter by Loan Type", ["All", "Federal Student Loan", "University Financial Aid", "Private Education Loan"])
+    with col3:
+        amount_filter = st.slider("Amount Range", 0, 100000, (0, 100000))
+    
+    filters = dict(
+        status_filter=status_filter if status_filter != "All" else None,
+        loan_type_filter=loan_type_filter if loan_type_filter != "All" else None,
+        min_amount=amount_filter[0],
+        max_amount=amount_filter[1]
+    )
+    total_loans = count_loan_applications(**filters)
+    page_count = max(1, -(-total_loans // LOAN_PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1) if page_count > 1 else 1
+    
+    # Rebuild the table and dropdown only when the filters, page or stored loans changed
+    view_key = (tuple(filters.values()), page, _loan_cache_version()["version"])
+    if st.session_state.get("admin_loans_key") != view_key:
+        # Load one page of applications from database with filters
+        loan_applications = load_all_loan_applications(
+            **filters,
+            offset=(page - 1) * LOAN_PAGE_SIZE,
+            limit=LOAN_PAGE_SIZE
+        )
+        st.session_state.admin_loans = loan_applications
+        st.session_state.admin_loans_by_id = {app.get("document_id"): app for app in loan_applications}
+        st.session_state.admin_loans_df = _loan_table(loan_applications) if loan_applications else None
+        st.session_state.admin_loan_options = [f"{app.get('document_id', '')} - {app.get('student_id', '')} (${app.get('loan_amount', 0):,.2f})" for app in loan_applications]
+        st.session_state.admin_loans_key = view_key
+    loan_applications = st.session_state.admin_loans
+    df = st.session_state.admin_loans_df
+    
+    if loan_applications:
+        st.caption(f"Showing {(page - 1) * LOAN_PAGE_SIZE + 1}-{(page - 1) * LOAN_PAGE_SIZE + len(loan_applications)} of {total_loans} applications")
+    
+    # Convert to dataframe for display
+    if loan_applications:
+        st.dataframe(
+            df,
+            use_container_width=True,
+            column_order=["id", "student_id", "type", "amount", "date", "status", "risk_score", "risk_level"]
+        )
+    else:
+        st.info("No loan applications found matching the selected filters.")
+    
+    st.subheader("Loan Application Details")
+    
+    # List of applications for selection dropdown
+    app_options = st.session_state.admin_loan_options
+    
+    selected_loan = st.selectbox("Select Application to Review", app_options if app_options else ["No applications available"])
+    
+    if selected_loan and "No applications" not in selected_loan:
+        loan_id = selected_loan.split(" - ")[0]
+        
+        # The table already holds the full documents, only go back to the database if the selection isn't among them
+        loan_detail = st.session_state.admin_loans_by_id.get(loan_id) or next(iter(_load_loans(ids=[loan_id])), None)
+        
+        if loan_detail:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Format loan data for display
+                display_data = {
+                    "document_id": loan_detail.get("document_id", ""),
+                    "student_info": {
+                        "student_id": loan_detail.get("student_id", ""),
+                        "academic_standing": "Good"  # Could retrieve from students collection
+                    },
+                    "loan_details": {
+                        "amount": loan_detail.get("loan_amount", 0),
+                        "type": loan_detail.get("loan_type", ""),
+                        "purpose": loan_detail.get("loan_purpose", []),
+                        "term": f"{loan_detail.get('loan_term', 10)} years",
+                        "interest_rate": f"{loan_detail.get('interest_rate', 4.5)}%"
+                    },
+                    "financial_info": {
+                        "annual_income": loan_detail.get("annual_income", 0),
+                        "other_aid": loan_detail.get("other_aid", 0),
+                        "existing_debt": loan_detail.get("existing_debt", 0)
+                    },
+                    "documents": {
+                        status: "Pending" for status in loan_detail.get("documents_pending", [])
+                    }
+                }
+                
+                st.json(display_data)
+            
+            with col2:
+                st.subheader("AI Risk Assessment")
+                
+                # Risk was scored for the whole table, score the loan on its own only if it isn't in it
+                risk_rows = df.loc[df["id"] == loan_id]
+                if risk_rows.empty:
+                    risk_rows = add_risk_columns(pd.DataFrame({
+                        "amount": [float(loan_detail.get("loan_amount", 0))],
+                        "annual_income": [float(loan_detail.get("annual_income", 0))],
+                        "existing_debt": [float(loan_detail.get("existing_debt", 0))]
+                    }))
+                risk_score = float(risk_rows["risk_score"].iloc[0])
+                risk_level = risk_rows["risk_level"].iloc[0]
+                
+                st.progress(risk_score/100)
+                
+                # Analysis based on risk level
+                analysis, recommendation = RISK_ASSESSMENT[risk_level]
+                
+                st.markdown(
+                    f"**Risk Score:** {risk_score:.0f}/100 ({risk_level})\n\n"
+                    "**Analysis:**\n"
+                    + "".join(f"- {point}\n" for point in analysis)
+                    + f"\n**Recommendation:** {recommendation}"
+                )
+            
+            col1, col2, col3 = st.columns(3)
+            
+            with col1:
+                if st.button("Approve Loan", use_container_width=True):
+                    if update_loan_status(loan_id, "Approved"):
+                        st.success(f"Loan {loan_id} has been approved")
+                        st.rerun()
+            
+            with col2:
+                if st.button("Request Documents", use_container_width=True):
+                    if update_loan_status(loan_id, "Awaiting Documents"):
+                        st.info(f"Document request sent to student")
+                        st.rerun()
+            
+            with col3:
+                if st.button("Deny Loan", use_container_width=True):
+                    denial_reason = st.text_area("Denial Reason", height=100)
+                    if st.button("Confirm Denial"):
+                        # Update loan status and add denial reason
+                        loan_detail["status"] = "Denied"
+                        loan_detail["denial_reason"] = denial_reason
+                        _db.update_document(
+                            collection_name="loans",
+                            document_id=loan_id,
+                            document=loan_detail,
+                            metadata={"status": "Denied"}
+                        )
+                        clear_loan_caches()
+                        st.error(f"Loan {loan_id} has been denied")
+                        st.rerun()
+
 if user_role == "student":
     # Student view - Loan application interface
     student_id = st.session_state.get("student_id")
@@ -143,8 +378,11 @@ if user_role == "student":
         for option in financial_aid_options:
             st.info(f"**{option.get('program', '')}:** {option.get('additional_requirements', '')}")
     
-    # Check if student has an existing loan application
-    existing_loan = load_loan_application(student_id)
+    # Check if student has an existing loan application, once per session; refreshed after a submission or on request
+    if st.session_state.get("existing_loan_student") != student_id:
+        st.session_state.existing_loan = load_loan_application(student_id)
+        st.session_state.existing_loan_student = student_id
+    existing_loan = st.session_state.existing_loan
     
     if existing_loan:
         # Display loan application status
@@ -154,25 +392,27 @@ if user_role == "student":
         st.subheader("Loan Application Details")
         col1, col2 = st.columns(2)
         
-        with col1:
-            st.markdown(f"**Application ID:** {existing_loan.get('document_id', 'N/A')}")
-            st.markdown(f"**Date Submitted:** {existing_loan.get('submitted_date', 'N/A')}")
-            st.markdown(f"**Status:** {existing_loan.get('status', 'Pending')}")
-            st.markdown(f"**Amount Requested:** ${existing_loan.get('loan_amount', 0):,.2f}")
+        loan_amount = existing_loan.get('loan_amount', 0)
+        loan_term = existing_loan.get('loan_term', 'N/A')
+        interest_rate = existing_loan.get('interest_rate', 4.5)
+        
+        col1.markdown(
+            f"**Application ID:** {existing_loan.get('document_id', 'N/A')}\n\n"
+            f"**Date Submitted:** {existing_loan.get('submitted_date', 'N/A')}\n\n"
+            f"**Status:** {existing_loan.get('status', 'Pending')}\n\n"
+            f"**Amount Requested:** ${loan_amount:,.2f}"
+        )
         
         with col2:
-            st.markdown(f"**Loan Term:** {existing_loan.get('loan_term', 'N/A')} years")
+            details = [f"**Loan Term:** {loan_term} years"]
             
             # Calculate monthly payment
             if 'loan_amount' in existing_loan and 'loan_term' in existing_loan:
-                interest_rate = existing_loan.get('interest_rate', 4.5) / 100
-                monthly_rate = interest_rate / 12
-                loan_term_months = existing_loan['loan_term'] * 12
-                
-                monthly_payment = existing_loan['loan_amount'] * (monthly_rate * (1 + monthly_rate) ** loan_term_months) / ((1 + monthly_rate) ** loan_term_months - 1)
-                st.markdown(f"**Estimated Monthly Payment:** ${monthly_payment:.2f}")
+                monthly_payment = _amortize(loan_amount, interest_rate / 100 / 12, loan_term * 12)
+                details.append(f"**Estimated Monthly Payment:** ${monthly_payment:.2f}")
                 
-            st.markdown(f"**Interest Rate:** {existing_loan.get('interest_rate', 4.5)}%")
+            details.append(f"**Interest Rate:** {interest_rate}%")
+            st.markdown("\n\n".join(details))
         
         # Display next steps
         st.subheader("Next Steps")
@@ -185,6 +425,10 @@ if user_role == "student":
         
         st.markdown(existing_loan.get("next_steps", "Your application is being processed."))
         
+        if st.button("Refresh Status"):
+            st.session_state.pop("existing_loan_student", None)
+            st.rerun()
+        
     else:
         # New loan application form
         tab1, tab2 = st.tabs(["Apply for Loan", "Loan Calculator"])
@@ -255,6 +499,8 @@ if user_role == "student":
                     st.info("Please proceed to document upload section to complete your application")
                     
                     st.session_state.loan_submitted = True
+                    st.session_state.existing_loan = loan_data
+                    st.session_state.existing_loan_student = student_id
                     st.rerun()
         
         with tab2:
@@ -275,7 +521,7 @@ if user_role == "student":
                 interest_rate_monthly = calc_interest_rate / 100 / 12
                 loan_term_months = calc_loan_term * 12
                 
-                monthly_payment = calc_loan_amount * (interest_rate_monthly * (1 + interest_rate_monthly) ** loan_term_months) / ((1 + interest_rate_monthly) ** loan_term_months - 1)
+                monthly_payment = _amortize(calc_loan_amount, interest_rate_monthly, loan_term_months)
                 
                 total_payment = monthly_payment * loan_term_months
                 total_interest = total_payment - calc_loan_amount
@@ -288,187 +534,26 @@ if user_role == "student":
                     st.metric("Total Interest", f"${total_interest:.2f}")
                 
                 with col2:
-                    years = range(1, calc_loan_term + 1)
-                    remaining_balance = [calc_loan_amount * (1 - ((1 + interest_rate_monthly) ** (year * 12) - 1) / ((1 + interest_rate_monthly) ** loan_term_months - 1)) for year in years]
+                    years = np.arange(1, calc_loan_term + 1)
+                    pow_year = np.power(1 + interest_rate_monthly, years * 12)
+                    # The last year's growth factor is the full-term one
+                    remaining_balance = calc_loan_amount * (1 - (pow_year - 1) / (pow_year[-1] - 1))
                     
-                    fig, ax = plt.subplots()
+                    # One figure per session, redrawn on each click; built outside pyplot so it isn't kept in its registry
+                    if "amortization_figure" not in st.session_state:
+                        st.session_state.amortization_figure = Figure()
+                        st.session_state.amortization_figure.subplots()
+                    fig = st.session_state.amortization_figure
+                    ax = fig.axes[0]
+                    ax.clear()
                     ax.plot(years, remaining_balance)
                     ax.set_xlabel("Years")
                     ax.set_ylabel("Remaining Balance ($)")
                     ax.set_title("Loan Amortization Schedule")
-                    st.pyplot(fig)
+                    st.pyplot(fig, clear_figure=False)
 
 elif user_role == "admin":
-    st.subheader("Loan Applications Dashboard")
-    
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        status_filter = st.selectbox("Filter by Status", ["All", "Pending", "Under Review", "Approved", "Denied", "Awaiting Documents"])
-    with col2:
-        loan_type_filter = st.selectbox("Filter by Loan Type", ["All", "Federal Student Loan", "University Financial Aid", "Private Education Loan"])
-    with col3:
-        amount_filter = st.slider("Amount Range", 0, 100000, (0, 100000))
-    
-    # Load applications from database with filters
-    loan_applications = load_all_loan_applications(
-        status_filter=status_filter if status_filter != "All" else None,
-        loan_type_filter=loan_type_filter if loan_type_filter != "All" else None,
-        min_amount=amount_filter[0],
-        max_amount=amount_filter[1]
-    )
-    
-    # Convert to dataframe for display
-    if loan_applications:
-        # Extract relevant fields for the table
-        table_data = []
-        for app in loan_applications:
-            table_data.append({
-                "id": app.get("document_id", ""),
-                "student_id": app.get("student_id", ""),
-                "type": app.get("loan_type", ""),
-                "amount": app.get("loan_amount", 0),
-                "date": app.get("submitted_date", ""),
-                "status": app.get("status", "")
-            })
-        
-        df = pd.DataFrame(table_data)
-        st.dataframe(df, use_container_width=True)
-    else:
-        st.info("No loan applications found matching the selected filters.")
-    
-    st.subheader("Loan Application Details")
-    
-    # Create list of applications for selection dropdown
-    app_options = []
-    if loan_applications:
-        app_options = [f"{app.get('document_id', '')} - {app.get('student_id', '')} (${app.get('loan_amount', 0):,.2f})" for app in loan_applications]
-    
-    selected_loan = st.selectbox("Select Application to Review", app_options if app_options else ["No applications available"])
-    
-    if selected_loan and "No applications" not in selected_loan:
-        loan_id = selected_loan.split(" - ")[0]
-        
-        # Fetch detailed loan data
-        loan_detail = db.get_document("loans", loan_id)
-        
-        if loan_detail:
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                # Format loan data for display
-                display_data = {
-                    "document_id": loan_detail.get("document_id", ""),
-                    "student_info": {
-                        "student_id": loan_detail.get("student_id", ""),
-                        "academic_standing": "Good"  # Could retrieve from students collection
-                    },
-                    "loan_details": {
-                        "amount": loan_detail.get("loan_amount", 0),
-                        "type": loan_detail.get("loan_type", ""),
-                        "purpose": loan_detail.get("loan_purpose", []),
-                        "term": f"{loan_detail.get('loan_term', 10)} years",
-                        "interest_rate": f"{loan_detail.get('interest_rate', 4.5)}%"
-                    },
-                    "financial_info": {
-                        "annual_income": loan_detail.get("annual_income", 0),
-                        "other_aid": loan_detail.get("other_aid", 0),
-                        "existing_debt": loan_detail.get("existing_debt", 0)
-                    },
-                    "documents": {
-                        status: "Pending" for status in loan_detail.get("documents_pending", [])
-                    }
-                }
-                
-                st.json(display_data)
-            
-            with col2:
-                st.subheader("AI Risk Assessment")
-                
-                # Calculate risk score (simple example)
-                income = loan_detail.get("annual_income", 0)
-                loan_amount = loan_detail.get("loan_amount", 0)
-                existing_debt = loan_detail.get("existing_debt", 0)
-                
-                # Simple risk score calculation (would be more sophisticated in production)
-                if income > 0:
-                    debt_ratio = (loan_amount + existing_debt) / income
-                    risk_score = max(0, min(100, 100 - (debt_ratio * 20)))
-                else:
-                    risk_score = 50  # Default moderate risk for no income
-                
-                st.progress(risk_score/100)
-                
-                risk_level = "High Risk"
-                if risk_score >= 70:
-                    risk_level = "Low Risk"
-                elif risk_score >= 40:
-                    risk_level = "Moderate Risk"
-                    
-                st.markdown(f"**Risk Score:** {risk_score:.0f}/100 ({risk_level})")
-                
-                # Analysis based on risk score
-                analysis = []
-                if risk_score >= 70:
-                    analysis = [
-                        "Strong financial position",
-                        "Good debt-to-income ratio",
-                        "Loan amount appropriate for circumstances"
-                    ]
-                elif risk_score >= 40:
-                    analysis = [
-                        "Acceptable financial position",
-                        "Moderate debt-to-income ratio",
-                        "Consider reduced loan amount"
-                    ]
-                else:
-                    analysis = [
-                        "Weak financial position",
-                        "High debt-to-income ratio",
-                        "Loan amount may be too high"
-                    ]
-                
-                st.markdown("**Analysis:**")
-                for point in analysis:
-                    st.markdown(f"- {point}")
-                
-                recommendation = "Deny" if risk_score < 40 else "Approve with conditions" if risk_score < 70 else "Approve with standard terms"
-                st.markdown(f"**Recommendation:** {recommendation}")
-            
-            col1, col2, col3 = st.columns(3)
-            current_status = loan_detail.get("status", "")
-            
-            with col1:
-                if st.button("Approve Loan", use_container_width=True):
-                    if update_loan_status(loan_id, "Approved"):
-                        st.success(f"Loan {loan_id} has been approved")
-                        st.rerun()
-            
-            with col2:
-                if st.button("Request Documents", use_container_width=True):
-                    if update_loan_status(loan_id, "Awaiting Documents"):
-                        st.info(f"Document request sent to student")
-                        st.rerun()
-            
-            with col3:
-                if st.button("Deny Loan", use_container_width=True):
-                    denial_reason = st.text_area("Denial Reason", height=100)
-                    if st.button("Confirm Denial"):
-                        # Update loan status and add denial reason
-                        loan_detail["status"] = "Denied"
-                        loan_detail["denial_reason"] = denial_reason
-                        db.update_document(
-                            collection_name="loans",
-                            document_id=loan_id,
-                            document=loan_detail,
-                            metadata={
-                                "student_id": loan_detail["student_id"],
-                                "status": "Denied",
-                                "loan_type": loan_detail["loan_type"],
-                                "amount": loan_detail["loan_amount"]
-                            }
-                        )
-                        st.error(f"Loan {loan_id} has been denied")
-                        st.rerun()
+    _admin_dashboard()
 
 else:
     st.warning("Please log in to apply for financial aid or view your loan status")
@@ -1,13 +1,17 @@
 ﻿import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime
 import json
+import re
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from chromadb.utils import embedding_functions
 
 from components.sidebar import render_sidebar
 from components.header import render_header
 from components.footer import render_footer
-from backend.database.chroma_client import get_document, query_documents, get_collection, add_document, update_document, delete_document
+from backend.database.chroma_client import get_document, query_documents, find_documents, find_documents_with_ids, collection_count, get_collection, add_document, add_documents, update_document_fields, update_documents_fields, delete_document, json_loads, json_dumps
 
 render_sidebar()
 render_header("Student Portal", "Track your application progress")
@@ -27,8 +31,147 @@ if user_role != "student":
     st.warning("You must be logged in as a student to access this portal")
     st.stop()
 
-# Retrieve student data from ChromaDB
-student_data = get_document("students", student_id)
+# AI assistant keyword routing: one case-insensitive scan, intents checked in ASSISTANT_INTENTS order
+ASSISTANT_INTENT_RE = re.compile(r"(?P<documents>recommendation letter|document)|(?P<financial_aid>financial aid|scholarship|loan)|(?P<timeline>timeline|decision|when)", re.IGNORECASE)
+ASSISTANT_INTENTS = ("documents", "financial_aid", "timeline")
+ASSISTANT_RESPONSES = {
+    "documents": "Thank you for your question. Based on your current application status, I recommend prioritizing the upload of your missing recommendation letter. This will help expedite your application review process. Would you like me to provide information about the recommendation letter requirements?",
+    "financial_aid": "For financial aid, you can apply through the Financial Aid tab. Based on your profile, you may qualify for several scholarships, particularly the Academic Excellence Scholarship if your GPA is 3.5 or higher. Would you like specific information about loan options?",
+    "timeline": "Once all your documents are verified, your application will move to the review stage. The admissions committee typically makes decisions within 2-3 weeks after all required materials are received. Currently, we estimate you'll receive a decision in approximately 10 days.",
+    "default": "Thank you for your question. I'd be happy to help with your application process. Please let me know if you have specific questions about your documents, timeline, financial aid options, or any other aspect of the admissions process."
+}
+
+# Sample data that would be added to ChromaDB in a real application, seeded on first visit
+SAMPLE_TIMELINE_EVENTS = (
+    {"date": "Mar 15, 2025", "event": "Application Submitted", "status": "Completed", "details": "Your application for Computer Science, B.Sc. has been received."},
+    {"date": "Mar 16, 2025", "event": "Document Verification", "status": "In Progress", "details": "2 of 4 required documents have been verified."},
+    {"date": "Pending", "event": "Application Review", "status": "Queued", "details": "Your application will be reviewed once all documents are verified."},
+    {"date": "Pending", "event": "Interview", "status": "Not Started", "details": "You may be invited for an interview based on your application."},
+    {"date": "Pending", "event": "Final Decision", "status": "Not Started", "details": "The admissions committee will make a final decision."}
+)
+SAMPLE_DOCUMENTS = (
+    {"name": "Official Transcript", "status": "Verified", "submitted": "Mar 15, 2025", "verified": "Mar 16, 2025"},
+    {"name": "ID/Passport Copy", "status": "Rejected", "submitted": "Mar 15, 2025", "notes": "Document unclear or incomplete. Please resubmit."},
+    {"name": "Personal Statement", "status": "Verified", "submitted": "Mar 15, 2025", "verified": "Mar 16, 2025"},
+    {"name": "Recommendation Letter", "status": "Not Submitted", "notes": "Required for application completion"}
+)
+SAMPLE_MESSAGES = (
+    {"date": "Mar 16, 2025", "sender": "Document Verification Team", "subject": "ID Document Rejected", "read": True, "content": "Dear Applicant,\n\nWe regret to inform you that your ID document has been rejected due to poor image quality. Please upload a clear, high-resolution scan or photo of your government-issued ID.\n\nBest regards,\nDocument Verification Team"},
+    {"date": "Mar 15, 2025", "sender": "Admissions Office", "subject": "Application Received", "read": True, "content": "Dear Applicant,\n\nWe are pleased to confirm that we have received your application for admission to the Computer Science, B.Sc. program. Our team will review your application once all required documents have been verified.\n\nBest regards,\nAdmissions Office"},
+    {"date": "Mar 15, 2025", "sender": "System", "subject": "Welcome to the University Admissions Portal", "read": True, "content": "Welcome to the University Admissions Portal! We're excited to have you here. Please complete all required steps to finalize your application."}
+)
+SAMPLE_SCHOLARSHIPS = (
+    {"name": "Academic Excellence Scholarship", "amount": "Up to $10,000", "deadline": "Apr 15, 2025", "requirements": "GPA of 3.5 or higher\nStrong academic record\nEssay submission"},
+    {"name": "STEM Leaders Award", "amount": "Up to $5,000", "deadline": "Apr 30, 2025", "requirements": "STEM major\nDemonstrated leadership\nTwo recommendation letters"},
+    {"name": "Diversity in Computing Grant", "amount": "Up to $7,500", "deadline": "May 15, 2025", "requirements": "Computer science major\nDemonstrated commitment to diversity\nPersonal statement"}
+)
+# The samples never change, so serialize them once rather than on every seeding
+SAMPLE_TIMELINE_EVENTS_JSON = tuple(json_dumps(event) for event in SAMPLE_TIMELINE_EVENTS)
+SAMPLE_DOCUMENTS_JSON = tuple(json_dumps(doc) for doc in SAMPLE_DOCUMENTS)
+SAMPLE_MESSAGES_JSON = tuple(json_dumps(msg) for msg in SAMPLE_MESSAGES)
+SAMPLE_SCHOLARSHIPS_JSON = tuple(json_dumps(scholarship) for scholarship in SAMPLE_SCHOLARSHIPS)
+
+# Notice shown next to a required document, by status
+DOCUMENT_STATUS_NOTICES = {
+    "Verified": (st.success, "This document has been verified successfully."),
+    "Rejected": (st.error, "This document was rejected. Please upload a new version."),
+    "Not Submitted": (st.warning, "This document needs to be submitted."),
+    "Pending": (st.info, "This document is being reviewed.")
+}
+
+@st.cache_resource(show_spinner=False)
+def seed_scholarships():
+    """Add the sample scholarships once per process, if there are none yet"""
+    if collection_count("eligibility_criteria", {"type": "scholarship"}) == 0:
+        add_documents(
+            "eligibility_criteria", 
+            SAMPLE_SCHOLARSHIPS_JSON,
+            [f"scholarship_{idx}" for idx in range(len(SAMPLE_SCHOLARSHIPS))],
+            [{"type": "scholarship"} for _ in SAMPLE_SCHOLARSHIPS]
+        )
+    return True
+
+@st.cache_data(ttl=300, show_spinner=False)
+def load_scholarships():
+    """Scholarships from ChromaDB, by metadata type rather than a vector search"""
+    seed_scholarships()
+    return [scholarship for scholarship, _ in find_documents("eligibility_criteria", where={"type": "scholarship"}, limit=5)]
+
+# Nothing in the app writes policies, so the local copy is refreshed on a short ttl instead of on writes
+@st.cache_resource(ttl=300, show_spinner=False)
+def _policy_index():
+    """University policy embeddings as one float32 matrix, with their documents, for local nearest-neighbour lookups"""
+    result = get_collection("university_policies").get(include=["embeddings", "documents"])
+    embeddings = np.asarray(result["embeddings"] or [], dtype=np.float32)
+    documents = [json_loads(doc) if doc else {} for doc in result["documents"]]
+    return embeddings, documents
+
+@st.cache_resource(show_spinner=False)
+def _embedding_function():
+    """Same default embedding model the collections use"""
+    return embedding_functions.DefaultEmbeddingFunction()
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _embed_query(text):
+    """Embedding for a chat question, cached so repeated questions aren't embedded again"""
+    return np.asarray(_embedding_function()([text])[0], dtype=np.float32)
+
+# Squared L2 distance above which the local best match counts as a miss (cosine similarity below 0.5
+# for the default model's normalized embeddings)
+POLICY_MATCH_MAX_DISTANCE = 1.0
+
+def search_policies(text, n_results=2):
+    """Closest university policies to the question, ranked by squared L2 distance like the collection"""
+    embeddings, documents = _policy_index()
+    if documents:
+        distances = np.square(embeddings - _embed_query(text)).sum(axis=1)
+        if distances.min() <= POLICY_MATCH_MAX_DISTANCE:
+            return [documents[i] for i in np.argsort(distances)[:n_results]]
+    # No close match in the local copy, ask Chroma in case policies were added since it was loaded
+    return query_documents("university_policies", text, n_results=n_results)
+
+# Portal sections and the views each one needs
+PORTAL_TABS = {
+    "Status Timeline": ("timeline",),
+    "Documents": ("documents",),
+    "Messages": (),
+    "Financial Aid": ("loans", "fees")
+}
+
+def _next_document_id(prefix):
+    """Unique document ID from a per-session token and counter, instead of a fresh uuid4 per write"""
+    # The token keeps IDs unique across sessions and reloads, which restart the counter
+    if "document_id_token" not in st.session_state:
+        st.session_state.document_id_token = uuid.uuid4().hex[:12]
+        st.session_state.document_id_seq = 0
+    st.session_state.document_id_seq += 1
+    return f"{prefix}_{st.session_state.document_id_token}_{st.session_state.document_id_seq}"
+
+@st.cache_data(ttl=60, show_spinner=False)
+def prefetch_student_views(student_id, views):
+    """Run the queries behind the given portal views concurrently, cached so reruns don't repeat them; cleared after every write"""
+    all_queries = {
+        "timeline": ("admissions", f"student:{student_id} timeline", 10, {"student_id": student_id}),
+        "documents": ("documents", f"student:{student_id} required documents", 10, {"student_id": student_id, "type": "required_document"}),
+        "loans": ("loans", f"student:{student_id} financial aid", 5, {"student_id": student_id, "type": "loan_application"}),
+        "fees": ("fee_structure", "Computer Science bachelor", 1, None)
+    }
+    queries = {view: all_queries[view] for view in views}
+    with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+        futures = {
+            view: pool.submit(query_documents, collection_name, query, n_results=n_results, metadata_filter=metadata_filter)
+            for view, (collection_name, query, n_results, metadata_filter) in queries.items()
+        }
+    return {view: future.result() for view, future in futures.items()}
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_student_messages(student_id):
+    """A student's messages as (id, message, metadata), so read flags can be written back by ID; cleared after every message write"""
+    return find_documents_with_ids("documents", where={"$and": [{"student_id": student_id}, {"type": "message"}]})
+
+# Retrieve student data from ChromaDB, once per session
+student_key = f"student_{student_id}"
+student_data = st.session_state.get(student_key) or get_document("students", student_id)
 if not student_data:
     # Create a new student record if it doesn't exist
     student_data = {
@@ -41,120 +184,108 @@ if not student_data:
         "decision_estimate": "10 days"
     }
     add_document("students", student_data, student_id, {"id": student_id})
+st.session_state[student_key] = student_data
 
 st.subheader(f"Welcome, {student_data.get('name', f'Student {student_id}')}")
 
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.metric("Application Status", student_data.get("application_status", "Under Review"), 
-              help="Current status of your application")
-
-with col2:
-    st.metric("Documents Verified", student_data.get("documents_verified", "2/4"), 
-              delta="-2", help="Number of verified documents")
-
-with col3:
-    st.metric("Estimated Decision", student_data.get("decision_estimate", "10 days"), 
-              delta="-2 days", help="Estimated time until final decision")
+# (label, student field, default, delta, help) for each summary metric
+metrics = (
+    ("Application Status", "application_status", "Under Review", None, "Current status of your application"),
+    ("Documents Verified", "documents_verified", "2/4", "-2", "Number of verified documents"),
+    ("Estimated Decision", "decision_estimate", "10 days", "-2 days", "Estimated time until final decision"),
+)
+for col, (label, key, default, delta, help_text) in zip(st.columns(len(metrics)), metrics):
+    col.metric(label, student_data.get(key, default), delta=delta, help=help_text)
 
 st.subheader("Application Overview")
 
-tab1, tab2, tab3, tab4 = st.tabs(["Status Timeline", "Documents", "Messages", "Financial Aid"])
+# Only the selected section is rendered (st.tabs would run every tab's queries on each rerun);
+# the selection is kept in the URL so a reload opens the same section
+tab_names = list(PORTAL_TABS)
+requested_tab = st.experimental_get_query_params().get("tab", [tab_names[0]])[0]
+active_tab = st.radio(
+    "Section",
+    tab_names,
+    index=tab_names.index(requested_tab) if requested_tab in tab_names else 0,
+    horizontal=True,
+    label_visibility="collapsed"
+)
+if active_tab != requested_tab:
+    st.experimental_set_query_params(tab=active_tab)
 
-with tab1:
+# Fetch the data for the selected section in one go (Messages loads its own)
+student_views = prefetch_student_views(student_id, PORTAL_TABS[active_tab]) if PORTAL_TABS[active_tab] else {}
+
+if active_tab == "Status Timeline":
     st.markdown("### Your Application Timeline")
     
-    # Query timeline events from ChromaDB
-    timeline_events_query = query_documents(
-        "admissions", 
-        f"student:{student_id} timeline", 
-        n_results=10, 
-        metadata_filter={"student_id": student_id}
-    )
+    # Timeline events from ChromaDB
+    timeline_events_query = student_views["timeline"]
     
     # Use query results if available, otherwise use sample data
+    seed_key = f"seeded_timeline_{student_id}"
     if timeline_events_query:
         timeline_events = timeline_events_query
+    elif seed_key in st.session_state:
+        # Seeded earlier this session, the cached query result just predates it
+        timeline_events = st.session_state[seed_key]
     else:
-        # Sample data that would be added to ChromaDB in a real application
-        timeline_events = [
-            {"date": "Mar 15, 2025", "event": "Application Submitted", "status": "Completed", "details": "Your application for Computer Science, B.Sc. has been received."},
-            {"date": "Mar 16, 2025", "event": "Document Verification", "status": "In Progress", "details": "2 of 4 required documents have been verified."},
-            {"date": "Pending", "event": "Application Review", "status": "Queued", "details": "Your application will be reviewed once all documents are verified."},
-            {"date": "Pending", "event": "Interview", "status": "Not Started", "details": "You may be invited for an interview based on your application."},
-            {"date": "Pending", "event": "Final Decision", "status": "Not Started", "details": "The admissions committee will make a final decision."}
-        ]
+        timeline_events = SAMPLE_TIMELINE_EVENTS
         
         # Add these events to ChromaDB for future reference
-        for idx, event in enumerate(timeline_events):
-            event_id = f"{student_id}_timeline_{idx}"
-            add_document(
-                "admissions", 
-                event, 
-                event_id,
-                {"student_id": student_id, "type": "timeline_event"}
-            )
+        add_documents(
+            "admissions", 
+            SAMPLE_TIMELINE_EVENTS_JSON, 
+            [f"{student_id}_timeline_{idx}" for idx in range(len(timeline_events))],
+            [{"student_id": student_id, "type": "timeline_event"} for _ in timeline_events]
+        )
+        st.session_state[seed_key] = timeline_events
     
-    for event in timeline_events:
-        col1, col2, col3 = st.columns([1, 2, 4])
-        
-        with col1:
-            st.write(event.get("date", "Pending"))
-        
-        with col2:
-            status = event.get("status", "Not Started")
-            if status == "Completed":
-                st.success(event.get("event", ""))
-            elif status == "In Progress":
-                st.info(event.get("event", ""))
-            elif status == "Queued":
-                st.warning(event.get("event", ""))
-            else:
-                st.text(event.get("event", ""))
-        
-        with col3:
-            st.write(event.get("details", ""))
+    timeline_df = pd.DataFrame(timeline_events, columns=["date", "event", "status", "details"]).fillna(
+        {"date": "Pending", "event": "", "status": "Not Started", "details": ""}
+    )
+    st.dataframe(
+        timeline_df,
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "date": "Date",
+            "event": "Event",
+            "status": "Status",
+            "details": st.column_config.TextColumn("Details", width="large")
+        }
+    )
     
     # Calculate progress based on completed events
-    completed_events = sum(1 for event in timeline_events if event.get("status") == "Completed")
-    progress_percentage = completed_events / len(timeline_events)
+    progress_percentage = float(timeline_df["status"].eq("Completed").mean()) if len(timeline_df) else 0.0
     
     st.progress(progress_percentage)
     st.caption(f"Application Progress: {int(progress_percentage * 100)}%")
 
-with tab2:
+if active_tab == "Documents":
     st.markdown("### Required Documents")
     
-    # Query documents from ChromaDB
-    required_docs_query = query_documents(
-        "documents", 
-        f"student:{student_id} required documents", 
-        n_results=10, 
-        metadata_filter={"student_id": student_id, "type": "required_document"}
-    )
+    # Documents from ChromaDB
+    required_docs_query = student_views["documents"]
     
     # Use query results if available, otherwise use sample data
+    seed_key = f"seeded_documents_{student_id}"
     if required_docs_query:
         documents = required_docs_query
+    elif seed_key in st.session_state:
+        # Seeded earlier this session, the cached query result just predates it
+        documents = st.session_state[seed_key]
     else:
-        # Sample data that would be added to ChromaDB in a real application
-        documents = [
-            {"name": "Official Transcript", "status": "Verified", "submitted": "Mar 15, 2025", "verified": "Mar 16, 2025"},
-            {"name": "ID/Passport Copy", "status": "Rejected", "submitted": "Mar 15, 2025", "notes": "Document unclear or incomplete. Please resubmit."},
-            {"name": "Personal Statement", "status": "Verified", "submitted": "Mar 15, 2025", "verified": "Mar 16, 2025"},
-            {"name": "Recommendation Letter", "status": "Not Submitted", "notes": "Required for application completion"}
-        ]
+        documents = SAMPLE_DOCUMENTS
         
         # Add these documents to ChromaDB for future reference
-        for idx, doc in enumerate(documents):
-            doc_id = f"{student_id}_document_{idx}"
-            add_document(
-                "documents", 
-                doc,
-                doc_id,
-                {"student_id": student_id, "type": "required_document", "name": doc["name"]}
-            )
+        add_documents(
+            "documents", 
+            SAMPLE_DOCUMENTS_JSON,
+            [f"{student_id}_document_{idx}" for idx in range(len(documents))],
+            [{"student_id": student_id, "type": "required_document", "name": doc["name"]} for doc in documents]
+        )
+        st.session_state[seed_key] = documents
     
     for idx, doc in enumerate(documents):
         expander_label = f"{doc.get('name', f'Document {idx}')} - {doc.get('status', 'Unknown')}"
@@ -177,15 +308,12 @@ with tab2:
                         if st.button(f"Submit {doc.get('name', 'document')}", key=f"submit_rejected_{idx}"):
                             # Update document status in ChromaDB
                             doc_id = f"{student_id}_document_{idx}"
-                            doc_updated = doc.copy()
-                            doc_updated["status"] = "Pending"
-                            doc_updated["submitted"] = datetime.now().strftime("%Y-%m-%d")
-                            update_document(
+                            update_document_fields(
                                 "documents", 
                                 doc_id, 
-                                doc_updated,
-                                {"student_id": student_id, "type": "required_document", "name": doc["name"]}
+                                {"status": "Pending", "submitted": datetime.now().strftime("%Y-%m-%d")}
                             )
+                            prefetch_student_views.clear()
                             st.success(f"New {doc.get('name', 'document')} submitted successfully")
                             st.rerun()
                 elif doc_status == 'Not Submitted':
@@ -195,88 +323,61 @@ with tab2:
                         if st.button(f"Submit {doc.get('name', 'document')}", key=f"submit_new_{idx}"):
                             # Update document status in ChromaDB
                             doc_id = f"{student_id}_document_{idx}"
-                            doc_updated = doc.copy()
-                            doc_updated["status"] = "Pending"
-                            doc_updated["submitted"] = datetime.now().strftime("%Y-%m-%d")
-                            update_document(
+                            update_document_fields(
                                 "documents", 
                                 doc_id, 
-                                doc_updated,
-                                {"student_id": student_id, "type": "required_document", "name": doc["name"]}
+                                {"status": "Pending", "submitted": datetime.now().strftime("%Y-%m-%d")}
                             )
+                            prefetch_student_views.clear()
                             st.success(f"{doc.get('name', 'document')} submitted successfully")
                             st.rerun()
             
             with col2:
-                if doc.get('status') == 'Verified':
-                    st.success("This document has been verified successfully.")
-                elif doc.get('status') == 'Rejected':
-                    st.error("This document was rejected. Please upload a new version.")
-                elif doc.get('status') == 'Not Submitted':
-                    st.warning("This document needs to be submitted.")
-                elif doc.get('status') == 'Pending':
-                    st.info("This document is being reviewed.")
-
-with tab3:
+                if doc_status in DOCUMENT_STATUS_NOTICES:
+                    render_notice, notice = DOCUMENT_STATUS_NOTICES[doc_status]
+                    render_notice(notice)
+
+if active_tab == "Messages":
     st.markdown("### Messages & Notifications")
     
-    # Query messages from ChromaDB
-    messages_query = query_documents(
-        "documents", 
-        f"student:{student_id} messages", 
-        n_results=10, 
-        metadata_filter={"student_id": student_id, "type": "message"}
-    )
+    # Messages from ChromaDB, with their IDs
+    messages = load_student_messages(student_id)
     
-    # Use query results if available, otherwise use sample data
-    if messages_query:
-        messages = messages_query
-    else:
-        # Sample data that would be added to ChromaDB in a real application
-        messages = [
-            {"date": "Mar 16, 2025", "sender": "Document Verification Team", "subject": "ID Document Rejected", "read": True, "content": "Dear Applicant,\n\nWe regret to inform you that your ID document has been rejected due to poor image quality. Please upload a clear, high-resolution scan or photo of your government-issued ID.\n\nBest regards,\nDocument Verification Team"},
-            {"date": "Mar 15, 2025", "sender": "Admissions Office", "subject": "Application Received", "read": True, "content": "Dear Applicant,\n\nWe are pleased to confirm that we have received your application for admission to the Computer Science, B.Sc. program. Our team will review your application once all required documents have been verified.\n\nBest regards,\nAdmissions Office"},
-            {"date": "Mar 15, 2025", "sender": "System", "subject": "Welcome to the University Admissions Portal", "read": True, "content": "Welcome to the University Admissions Portal! We're excited to have you here. Please complete all required steps to finalize your application."}
-        ]
-        
-        # Add these messages to ChromaDB for future reference
-        for idx, msg in enumerate(messages):
-            msg_id = f"{student_id}_message_{idx}"
-            add_document(
-                "documents", 
-                msg,
-                msg_id,
-                {"student_id": student_id, "type": "message", "sender": msg["sender"]}
-            )
+    # Seed sample messages the first time a student has none
+    if not messages:
+        add_documents(
+            "documents", 
+            SAMPLE_MESSAGES_JSON,
+            [f"{student_id}_message_{idx}" for idx in range(len(SAMPLE_MESSAGES))],
+            [{"student_id": student_id, "type": "message", "sender": msg["sender"]} for msg in SAMPLE_MESSAGES]
+        )
+        load_student_messages.clear()
+        messages = load_student_messages(student_id)
     
-    for idx, msg in enumerate(messages):
-        col1, col2 = st.columns([3, 1])
-        
-        with col1:
-            if not msg.get("read", True):
-                st.markdown(f"**{msg.get('subject', 'No subject')}** - {msg.get('sender', 'Unknown')}")
-            else:
-                st.write(f"{msg.get('subject', 'No subject')} - {msg.get('sender', 'Unknown')}")
-        
-        with col2:
-            st.write(msg.get("date", "Unknown date"))
+    # Only messages sent to the student can be unread; their own outgoing ones are skipped
+    own_sender = f"Student {student_id}"
+    unread_ids = [
+        msg_id for msg_id, msg, metadata in messages
+        if not msg.get("read", True) and metadata.get("sender") != own_sender
+    ]
+    
+    for msg_id, msg, metadata in messages:
+        subject = msg.get('subject', 'No subject')
+        label = f"**{subject}**" if msg_id in unread_ids else subject
         
-        view_key = f"view_{idx}"
-        if st.button("View", key=view_key):
-            msg_content = msg.get("content", "No content available")
-            st.info(msg_content)
+        with st.expander(f"{label} - {msg.get('sender', 'Unknown')} - {msg.get('date', 'Unknown date')}"):
+            st.info(msg.get("content", "No content available"))
             
-            # Mark as read in ChromaDB if not already read
-            if not msg.get("read", True):
-                msg_id = f"{student_id}_message_{idx}"
-                msg_updated = msg.copy()
-                msg_updated["read"] = True
-                update_document(
-                    "documents", 
-                    msg_id, 
-                    msg_updated,
-                    {"student_id": student_id, "type": "message", "sender": msg["sender"]}
-                )
+            if msg_id in unread_ids and st.button("Mark as Read", key=f"read_{msg_id}"):
+                update_document_fields("documents", msg_id, {"read": True})
+                load_student_messages.clear()
+                st.rerun()
+    
+    # Mark every unread message read in one write
+    if unread_ids and st.button("Mark All as Read"):
+        update_documents_fields("documents", unread_ids, {"read": True})
+        load_student_messages.clear()
+        st.rerun()
     
     message_text = st.text_area("Send a message to the admissions team", height=100)
     
@@ -292,29 +393,25 @@ with tab3:
                 "to": "Admissions Office"
             }
             
-            msg_id = f"{student_id}_message_outgoing_{uuid.uuid4()}"
+            msg_id = _next_document_id(f"{student_id}_message_outgoing")
             add_document(
                 "documents", 
                 new_msg,
                 msg_id,
                 {"student_id": student_id, "type": "message", "sender": f"Student {student_id}"}
             )
+            load_student_messages.clear()
             
             st.success("Message sent successfully")
             st.rerun()
         else:
             st.error("Please enter a message before sending")
 
-with tab4:
+if active_tab == "Financial Aid":
     st.markdown("### Financial Aid & Loans")
     
-    # Query financial data from ChromaDB
-    financial_data_query = query_documents(
-        "loans", 
-        f"student:{student_id} financial aid", 
-        n_results=5, 
-        metadata_filter={"student_id": student_id, "type": "loan_application"}
-    )
+    # Financial data from ChromaDB
+    financial_data_query = student_views["loans"]
     
     # Check if there's existing loan application data
     has_loan_application = len(financial_data_query) > 0
@@ -324,8 +421,8 @@ with tab4:
     with col1:
         st.markdown("#### Estimated Costs")
         
-        # Query fee structure from ChromaDB
-        fee_structure = query_documents("fee_structure", "Computer Science bachelor", n_results=1)
+        # Fee structure from ChromaDB
+        fee_structure = student_views["fees"]
         
         if fee_structure:
             costs_data = fee_structure[0].get("costs", {})
@@ -339,10 +436,7 @@ with tab4:
                 'Total': '$41,000'
             }
         
-        costs = pd.DataFrame({
-            'Expense': list(costs_data.keys()),
-            'Amount': list(costs_data.values())
-        })
+        costs = pd.DataFrame(costs_data.items(), columns=['Expense', 'Amount'])
         
         st.table(costs)
         
@@ -372,32 +466,8 @@ with tab4:
     with col2:
         st.markdown("#### Scholarships You May Qualify For")
         
-        # Query scholarships from ChromaDB
-        scholarships_query = query_documents(
-            "eligibility_criteria", 
-            "scholarships", 
-            n_results=5
-        )
-        
-        if scholarships_query:
-            scholarships = scholarships_query
-        else:
-            # Sample data
-            scholarships = [
-                {"name": "Academic Excellence Scholarship", "amount": "Up to $10,000", "deadline": "Apr 15, 2025", "requirements": "GPA of 3.5 or higher\nStrong academic record\nEssay submission"},
-                {"name": "STEM Leaders Award", "amount": "Up to $5,000", "deadline": "Apr 30, 2025", "requirements": "STEM major\nDemonstrated leadership\nTwo recommendation letters"},
-                {"name": "Diversity in Computing Grant", "amount": "Up to $7,500", "deadline": "May 15, 2025", "requirements": "Computer science major\nDemonstrated commitment to diversity\nPersonal statement"}
-            ]
-            
-            # Add scholarships to ChromaDB
-            for idx, scholarship in enumerate(scholarships):
-                scholarship_id = f"scholarship_{idx}"
-                add_document(
-                    "eligibility_criteria", 
-                    scholarship,
-                    scholarship_id,
-                    {"type": "scholarship"}
-                )
+        # Scholarships from ChromaDB, seeded with the sample ones on first use
+        scholarships = load_scholarships()
         
         for idx, scholarship in enumerate(scholarships):
             with st.expander(f"{scholarship.get('name', f'Scholarship {idx}')} - {scholarship.get('amount', 'Unknown amount')}"):
@@ -417,13 +487,14 @@ with tab4:
                         "status": "Submitted"
                     }
                     
-                    document_id = f"{student_id}_scholarship_{uuid.uuid4()}"
+                    document_id = _next_document_id(f"{student_id}_scholarship")
                     add_document(
                         "eligibility_criteria", 
                         application,
                         document_id,
                         {"student_id": student_id, "type": "scholarship_application"}
                     )
+                    prefetch_student_views.clear()
                     
                     st.success("Scholarship application initiated")
                     st.rerun()
@@ -442,47 +513,35 @@ for message in st.session_state.chat_messages:
 user_input = st.chat_input("Ask a question about your application...")
 
 if user_input:
+    # One timestamp for both sides of the exchange
+    chat_timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    
     # Add user message to chat history
     st.session_state.chat_messages.append({"role": "user", "content": user_input})
     
     with st.chat_message("user"):
         st.write(user_input)
     
-    # Store the chat message in ChromaDB
+    # Chat message to store in ChromaDB along with the response
     chat_message = {
         "student_id": student_id,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": chat_timestamp,
         "content": user_input,
         "role": "user"
     }
     
-    chat_id = f"{student_id}_chat_{uuid.uuid4()}"
-    add_document(
-        "documents", 
-        chat_message,
-        chat_id,
-        {"student_id": student_id, "type": "chat_message"}
-    )
-    
-    # Query relevant information from ChromaDB based on user query
-    relevant_info = query_documents(
-        "university_policies", 
-        user_input, 
-        n_results=2
-    )
-    
     # Generate AI response based on user query and relevant info
-    if "recommendation letter" in user_input.lower() or "document" in user_input.lower():
-        ai_response = "Thank you for your question. Based on your current application status, I recommend prioritizing the upload of your missing recommendation letter. This will help expedite your application review process. Would you like me to provide information about the recommendation letter requirements?"
-    elif "financial aid" in user_input.lower() or "scholarship" in user_input.lower() or "loan" in user_input.lower():
-        ai_response = "For financial aid, you can apply through the Financial Aid tab. Based on your profile, you may qualify for several scholarships, particularly the Academic Excellence Scholarship if your GPA is 3.5 or higher. Would you like specific information about loan options?"
-    elif "timeline" in user_input.lower() or "decision" in user_input.lower() or "when" in user_input.lower():
-        ai_response = "Once all your documents are verified, your application will move to the review stage. The admissions committee typically makes decisions within 2-3 weeks after all required materials are received. Currently, we estimate you'll receive a decision in approximately 10 days."
-    elif len(relevant_info) > 0:
-        # Use information from ChromaDB if available
-        ai_response = f"Based on our university policies, I can tell you that: {relevant_info[0].get('content', 'Please check with the admissions office for more details.')}"
+    matched_intents = {match.lastgroup for match in ASSISTANT_INTENT_RE.finditer(user_input)}
+    intent = next((intent for intent in ASSISTANT_INTENTS if intent in matched_intents), None)
+    if intent:
+        ai_response = ASSISTANT_RESPONSES[intent]
     else:
-        ai_response = "Thank you for your question. I'd be happy to help with your application process. Please let me know if you have specific questions about your documents, timeline, financial aid options, or any other aspect of the admissions process."
+        # Look up relevant policies only when no keyword matched
+        relevant_info = search_policies(user_input)
+        if relevant_info:
+            ai_response = f"Based on our university policies, I can tell you that: {relevant_info[0].get('content', 'Please check with the admissions office for more details.')}"
+        else:
+            ai_response = ASSISTANT_RESPONSES["default"]
     
     # Add AI response to chat history
     with st.chat_message("assistant"):
@@ -490,20 +549,19 @@ if user_input:
     
     st.session_state.chat_messages.append({"role": "assistant", "content": ai_response})
     
-    # Store the AI response in ChromaDB
     ai_chat_message = {
         "student_id": student_id,
-        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "timestamp": chat_timestamp,
         "content": ai_response,
         "role": "assistant"
     }
     
-    ai_chat_id = f"{student_id}_chat_{uuid.uuid4()}"
-    add_document(
+    # Store the message and the AI response in ChromaDB in one call
+    add_documents(
         "documents", 
-        ai_chat_message,
-        ai_chat_id,
-        {"student_id": student_id, "type": "chat_message"}
+        [chat_message, ai_chat_message],
+        [_next_document_id(f"{student_id}_chat"), _next_document_id(f"{student_id}_chat")],
+        [{"student_id": student_id, "type": "chat_message"}, {"student_id": student_id, "type": "chat_message"}]
     )
 
 render_footer()
\ No newline at end of file